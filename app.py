@@ -1,9 +1,14 @@
+import functools
+
 import streamlit as st
 import psycopg2
-import pandas as pd
+import psycopg2.errors
 from streamlit import secrets
 import google.generativeai as genai
 
+import sql_assistant
+from sql_assistant import CursorReaper, PostgresPool, PromptCache, QueryRejected, ResultCache, SingleFlight, SqlGuard
+
 
 st.set_page_config(page_title="EAS503 Gemini SQL Assistant", layout="wide")
 
@@ -24,25 +29,84 @@ st.success("✔ Password accepted! Loading dashboard...")
 
 @st.cache_resource
 def connect_db():
-    return psycopg2.connect(
-        host=secrets["DB_HOST"],
-        dbname=secrets["DB_NAME"],
-        user=secrets["DB_USER"],
-        password=secrets["DB_PASSWORD"],
-        port=secrets["DB_PORT"]
+    # One pool per server process, shared by every session; each query checks out its own connection.
+    return PostgresPool(
+        functools.partial(
+            psycopg2.connect,
+            host=secrets["DB_HOST"],
+            dbname=secrets["DB_NAME"],
+            user=secrets["DB_USER"],
+            password=secrets["DB_PASSWORD"],
+            port=secrets["DB_PORT"]
+        ),
+        maxconn=int(secrets.get("DB_POOL_SIZE", 10)),
+    )
+
+pool = connect_db()
+
+
+@st.cache_resource
+def get_flights():
+    # Model calls and queries run here, off the script thread; identical requests in flight share one call.
+    return SingleFlight(max_workers=int(secrets.get("ASSISTANT_WORKERS", secrets.get("DB_POOL_SIZE", 10))))
+
+flights = get_flights()
+
+
+@st.cache_resource
+def get_result_cache():
+    return ResultCache(
+        max_bytes=int(secrets.get("RESULT_CACHE_MB", 256)) * 1024 * 1024,
+        version_sql=secrets.get("DATA_VERSION_SQL", sql_assistant.DEFAULT_DATA_VERSION_SQL),
     )
 
-conn = connect_db()
+result_cache = get_result_cache()
+
+
+@st.cache_resource
+def get_cursor_reaper():
+    # A half-read result holds a pooled connection; give it back once nobody has paged it for a while.
+    return CursorReaper(idle_timeout=float(secrets.get("CURSOR_IDLE_TIMEOUT", sql_assistant.DEFAULT_IDLE_TIMEOUT)))
+
+cursor_reaper = get_cursor_reaper()
+
+
+PAGE_SIZE = int(secrets.get("RESULT_PAGE_SIZE", sql_assistant.DEFAULT_PAGE_SIZE))
+MAX_ROWS = int(secrets.get("RESULT_MAX_ROWS", sql_assistant.DEFAULT_MAX_ROWS))
+
+# One row past the display cap, so a result cut off by the injected LIMIT still reads as truncated.
+guard = SqlGuard(
+    max_cost=float(secrets.get("MAX_QUERY_COST", sql_assistant.DEFAULT_MAX_COST)),
+    limit=MAX_ROWS + 1,
+    statement_timeout=float(secrets.get("STATEMENT_TIMEOUT", sql_assistant.DEFAULT_STATEMENT_TIMEOUT)),
+)
 
 
 def run_query(sql):
+    """Open ``sql`` and fetch its first page; returns a ``PagedResult``, or None on error."""
     try:
-        return pd.read_sql(sql, conn)
+        return sql_assistant.open_query(
+            pool, sql, cache=result_cache, guard=guard, page_size=PAGE_SIZE, max_rows=MAX_ROWS, flights=flights,
+            reaper=cursor_reaper,
+        )
+    except QueryRejected as e:
+        st.warning(f"🛑 Query not run. {e}")
+        return None
+    except psycopg2.errors.QueryCanceled:
+        st.error(f"⏱ The query ran longer than {guard.statement_timeout:g} seconds and was cancelled.")
+        return None
     except Exception as e:
         st.error(f"SQL Error: {e}")
         return None
 
 
+def load_more_rows():
+    try:
+        st.session_state.result.fetch_more()
+    except Exception as e:
+        st.session_state.result_error = f"SQL Error: {e}"
+
+
 
 genai.configure(api_key=secrets["GEMINI_API_KEY"])
 model = genai.GenerativeModel("gemini-2.5-flash")
@@ -77,35 +141,21 @@ STRICT RULES:
 """
 
 
-def nl_to_sql(prompt):
-    """Convert English → SQL using Gemini safely."""
-    response = model.generate_content(
-        SYSTEM_PROMPT + "\nUser Prompt: " + prompt
+@st.cache_resource
+def get_prompt_cache():
+    # Survives restarts on disk; a new SYSTEM_PROMPT or model gets a fresh cache.
+    return PromptCache(
+        path=secrets.get("PROMPT_CACHE_PATH", "prompt_cache.sqlite"),
+        version=sql_assistant.prompt_version(SYSTEM_PROMPT, model.model_name),
+        ttl=float(secrets.get("PROMPT_CACHE_TTL", 7 * 24 * 3600)),
     )
-    
-    sql = response.text.strip()
-
-
-    sql = sql.replace("```sql", "")
-    sql = sql.replace("```", "")
-    sql = sql.replace("`", "")
-    sql = sql.strip()
-
-    # Remove accidental "sql " prefix
-    if sql.lower().startswith("sql "):
-        sql = sql[4:].strip()
 
-    if sql.lower().startswith("sql\n"):
-        sql = sql[4:].strip()
+prompt_cache = get_prompt_cache()
 
-    # Remove semicolon
-    sql = sql.rstrip(";").strip()
 
-    # 🛑 SAFETY PATCH: Fix hallucinated id column
-    sql = sql.replace("COUNT(id)", "COUNT(*)")
-    sql = sql.replace("count(id)", "COUNT(*)")
-
-    return sql
+def nl_to_sql(prompt):
+    """Convert English → SQL using Gemini safely."""
+    return sql_assistant.nl_to_sql(model, SYSTEM_PROMPT, prompt, cache=prompt_cache, flights=flights)
 
 
 
@@ -124,25 +174,61 @@ if st.button("Generate SQL & Run"):
     with st.spinner("🤖 Generating SQL using Gemini..."):
         sql_query = nl_to_sql(prompt)
 
-    st.subheader("🧠 Generated SQL")
-    st.code(sql_query, language="sql")
+    # The previous question's cursor holds a pooled connection until it is closed.
+    previous = st.session_state.pop("result", None)
+    if previous is not None:
+        previous.close()
 
     # Run SQL
     with st.spinner("📡 Running query on PostgreSQL..."):
-        df = run_query(sql_query)
+        result = run_query(sql_query)
 
-    if df is not None:
-        st.success("✔ Query executed successfully!")
-        st.dataframe(df)
+    st.session_state.sql_query = sql_query
+    if result is not None:
+        st.session_state.result = result
 
-        # Auto chart
-        numeric_cols = df.select_dtypes(include=["int64", "float64"]).columns
-        text_cols = df.select_dtypes(include=["object"]).columns
 
-        if len(numeric_cols) > 0 and len(text_cols) > 0:
-            try:
-                st.subheader("📊 Auto Chart")
-                st.bar_chart(df.set_index(text_cols[0])[numeric_cols[0]])
-            except:
-                st.info("Chart not available for this query.")
+if "sql_query" in st.session_state:
+    st.subheader("🧠 Generated SQL")
+    st.code(st.session_state.sql_query, language="sql")
+
+result = st.session_state.get("result")
+
+if result is not None and result.sql != st.session_state.get("sql_query"):
+    st.caption("Executed as:")
+    st.code(result.sql, language="sql")
+
+if result is not None:
+    if result.from_cache:
+        st.success("✔ Served from cache (data unchanged since this query last ran)")
+    elif result.shared:
+        st.success("✔ Shared the result of an identical query that was already running")
+    else:
+        st.success("✔ Query executed successfully!")
 
+    error = st.session_state.pop("result_error", None)
+    if error:
+        st.error(error)
+
+    df = result.frame
+    st.dataframe(df)
+
+    if not result.complete:
+        st.caption(f"Showing the first {len(df):,} rows.")
+        st.button(f"Load {PAGE_SIZE:,} more rows", on_click=load_more_rows)
+    elif result.expired:
+        st.info(f"Showing the first {len(df):,} rows. The query was closed after sitting idle; "
+                "run it again to load more.")
+    elif result.truncated:
+        st.warning(f"Showing the first {len(df):,} rows; the rest were not loaded (limit {MAX_ROWS:,}).")
+
+    # Auto chart
+    numeric_cols = df.select_dtypes(include=["int64", "float64"]).columns
+    text_cols = df.select_dtypes(include=["object"]).columns
+
+    if len(numeric_cols) > 0 and len(text_cols) > 0:
+        try:
+            st.subheader("📊 Auto Chart")
+            st.bar_chart(df.set_index(text_cols[0])[numeric_cols[0]])
+        except:
+            st.info("Chart not available for this query.")
@@ -0,0 +1,253 @@
+"""Timing harness for the normalized database build, reports and flat export.
+
+Usage: python benchmark.py [data.csv] [--repeat N]
+       python benchmark.py --suite [--sizes N ...] [--output results.json] [--compare old.json]
+
+The second form generates synthetic data at each size (customer count), times
+every stepN function and exN query on it and saves the timings as JSON;
+``--compare`` prints the ratio of each timing to an earlier run.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import make_flat_csv
+import mini_project2
+import synthetic_data
+
+
+def time_call(func, *args, repeat=3, **kwargs):
+    """Return the best wall time in seconds of ``repeat`` calls."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_build_profiles(data_filename, repeat=3):
+    """Time the full build with the default connection settings and with bulk_load."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "normalized.db")
+        for label, bulk_load in (("default", False), ("bulk_load", True)):
+            results[label] = time_call(
+                mini_project2.build_normalized_database, data_filename, db,
+                repeat=repeat, bulk_load=bulk_load,
+            )
+    return results
+
+
+def bench_ex3(data_filename, repeat=3):
+    """Time the ex3 customer ranking from OrderDetail and from the aggregate table."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "normalized.db")
+        mini_project2.build_normalized_database(data_filename, db, bulk_load=True)
+        conn = mini_project2.open_report_connection(db)
+        try:
+            for label, use_aggregates in (("orderdetail", False), ("aggregate", True)):
+                sql_statement = mini_project2.ex3(conn, use_aggregates=use_aggregates)
+                results[label] = time_call(
+                    lambda: conn.execute(sql_statement).fetchall(), repeat=repeat
+                )
+        finally:
+            conn.close()
+    return results
+
+
+def bench_ex8(data_filename, repeat=3):
+    """Time the ex8 rollup from OrderDetail and from the result cache."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "normalized.db")
+        mini_project2.build_normalized_database(data_filename, db, bulk_load=True)
+        conn = mini_project2.open_report_connection(db)
+        try:
+            sql_statement = mini_project2.ex8(conn)
+            results["orderdetail"] = time_call(
+                lambda: conn.execute(sql_statement).fetchall(), repeat=repeat
+            )
+            mini_project2.run_report(conn, "ex8")
+            results["cached"] = time_call(mini_project2.run_report, conn, "ex8", repeat=repeat)
+        finally:
+            conn.close()
+    return results
+
+
+def bench_flatten(data_filename, repeat=3):
+    """Time the vectorized flat export against the original row-by-row version."""
+    return {
+        "rowwise": time_call(make_flat_csv._make_orders_dataframe_rowwise, data_filename, repeat=repeat),
+        "vectorized": time_call(make_flat_csv.make_orders_dataframe, data_filename, repeat=repeat),
+    }
+
+
+# (name, takes the data file) for each step, in the order they have to run.
+STEPS = [
+    ("step1_create_region_table", True),
+    ("step2_create_region_to_regionid_dictionary", False),
+    ("step3_create_country_table", True),
+    ("step4_create_country_to_countryid_dictionary", False),
+    ("step5_create_customer_table", True),
+    ("step6_create_customer_to_customerid_dictionary", False),
+    ("step7_create_productcategory_table", True),
+    ("step8_create_productcategory_to_productcategoryid_dictionary", False),
+    ("step9_create_product_table", True),
+    ("step10_create_product_to_productid_dictionary", False),
+    ("step11_create_orderdetail_table", True),
+]
+QUERIES = ["ex1", "ex2", "ex3", "ex4", "ex5", "ex6", "ex7", "ex8", "ex9", "ex10", "ex11"]
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+def bench_steps(data_filename, db, repeat=3):
+    """Time each step in order; dictionary steps are timed without the lookup cache."""
+    results = {}
+    for name, takes_data in STEPS:
+        step = getattr(mini_project2, name)
+        args = (data_filename, db) if takes_data else (db,)
+
+        def cold_step():
+            mini_project2._forget_database(db)
+            step(*args)
+
+        results[name.split("_", 1)[0]] = time_call(cold_step, repeat=repeat)
+    return results
+
+
+def bench_queries(db, repeat=3):
+    """Time the SQL of every exN query against a fully built database."""
+    conn = mini_project2.open_report_connection(db)
+    try:
+        customer = conn.execute(
+            "SELECT FirstName || ' ' || LastName FROM Customer ORDER BY CustomerID LIMIT 1"
+        ).fetchone()[0]
+        results = {}
+        for name in QUERIES:
+            args = (customer,) if name in ("ex1", "ex2") else ()
+            sql_statement, params = getattr(mini_project2, name)(conn, *args, parameterized=True)
+            results[name] = time_call(
+                lambda: conn.execute(sql_statement, params).fetchall(), repeat=repeat
+            )
+    finally:
+        conn.close()
+    return results
+
+
+def run_suite(sizes=DEFAULT_SIZES, repeat=3, seed=0, **generator_options):
+    """Generate data at each size and time every step and query on it.
+
+    ``generator_options`` are passed to ``synthetic_data.generate_data``
+    (items_per_customer, products, categories, start_date, end_date).
+    """
+    runs = []
+    for customers in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_filename = os.path.join(tmp, "data.csv")
+            db = os.path.join(tmp, "normalized.db")
+            start = time.perf_counter()
+            order_lines = synthetic_data.generate_data(
+                data_filename, customers=customers, seed=seed, **generator_options
+            )
+            generate_seconds = time.perf_counter() - start
+            timings = bench_steps(data_filename, db, repeat=repeat)
+            timings.update(bench_queries(db, repeat=repeat))
+            mini_project2._forget_database(db)
+        runs.append({
+            "customers": customers,
+            "order_lines": order_lines,
+            "generate_seconds": generate_seconds,
+            "timings": timings,
+        })
+    return {
+        "environment": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "parameters": dict(generator_options, repeat=repeat, seed=seed),
+        "runs": runs,
+    }
+
+
+def compare_results(old, new):
+    """Return (customers, name, old seconds, new seconds) for timings present in both runs."""
+    old_runs = {run["customers"]: run["timings"] for run in old["runs"]}
+    rows = []
+    for run in new["runs"]:
+        before = old_runs.get(run["customers"], {})
+        for name, seconds in run["timings"].items():
+            if name in before:
+                rows.append((run["customers"], name, before[name], seconds))
+    return rows
+
+
+def suite_main(args):
+    generator_options = {
+        key: getattr(args, key)
+        for key in ("items_per_customer", "products", "categories", "start_date", "end_date")
+    }
+    results = run_suite(args.sizes, repeat=args.repeat, seed=args.seed, **generator_options)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    for run in results["runs"]:
+        print(f"{run['customers']} customers, {run['order_lines']} order lines")
+        for name, seconds in run["timings"].items():
+            print(f"  {name}: {seconds:.4f}s")
+    print(f"results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        for customers, name, before, after in compare_results(old, results):
+            print(f"{customers} {name}: {before:.4f}s -> {after:.4f}s ({after / before:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("data_filename", nargs="?", default="data.csv")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--suite", action="store_true", help="run the scaling suite on synthetic data")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="customer counts")
+    parser.add_argument("--items-per-customer", type=int, default=10)
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--categories", type=int, default=10)
+    parser.add_argument("--start-date", default="2019-01-01")
+    parser.add_argument("--end-date", default="2021-12-31")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args()
+    if args.suite:
+        suite_main(args)
+        return
+
+    results = bench_build_profiles(args.data_filename, repeat=args.repeat)
+    for label, seconds in results.items():
+        print(f"build [{label}]: {seconds:.3f}s")
+    print(f"bulk_load speedup: {results['default'] / results['bulk_load']:.2f}x")
+
+    for label, seconds in bench_ex3(args.data_filename, repeat=args.repeat).items():
+        print(f"ex3 [{label}]: {seconds * 1000:.2f}ms")
+
+    for label, seconds in bench_ex8(args.data_filename, repeat=args.repeat).items():
+        print(f"ex8 [{label}]: {seconds * 1000:.2f}ms")
+
+    results = bench_flatten(args.data_filename, repeat=args.repeat)
+    for label, seconds in results.items():
+        print(f"flatten [{label}]: {seconds:.3f}s")
+    print(f"vectorized speedup: {results['rowwise'] / results['vectorized']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""In-memory columnar engine for the ex3-ex11 reports.
+
+The normalized tables are read once into NumPy arrays; dimension IDs are
+already dense integers, so they index the dimension columns directly and
+every report is a handful of vectorized group-bys (``np.bincount`` /
+``np.unique``), ranks and sorts. Results have the same columns, values and
+ordering as the SQL of the matching ``mini_project2.exN`` function; rows that
+tie on the ORDER BY columns may come out in a different order.
+
+    engine = load_engine("normalized.db")
+    engine.report("ex6")
+"""
+import os
+import threading
+from collections import OrderedDict
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+
+import mini_project2
+
+
+def _sql_round(values, digits):
+    """SQLite's ROUND(): half away from zero, unlike ``np.round``.
+
+    With ``digits > 0`` SQLite rounds the value's decimal form (15 significant
+    digits), not the binary double, so ``ROUND(577.795, 2)`` is 577.8 even
+    though the double is 577.79499...; that path goes through ``Decimal``.
+    """
+    if digits == 0:
+        return np.sign(values) * np.floor(np.abs(values) + 0.5)
+    quantum = Decimal(1).scaleb(-digits)
+    return np.array([
+        float(Decimal(format(value, ".15g")).quantize(quantum, rounding=ROUND_HALF_UP))
+        for value in np.asarray(values, dtype=np.float64).tolist()
+    ], dtype=np.float64)
+
+
+def _rank_desc(partition, values):
+    """RANK() OVER (PARTITION BY partition ORDER BY values DESC) for each element."""
+    n = len(values)
+    order = np.lexsort((-values, partition))
+    p = partition[order]
+    v = values[order]
+    pos = np.arange(n)
+    new_partition = np.r_[True, p[1:] != p[:-1]]
+    new_value = new_partition | np.r_[True, v[1:] != v[:-1]]
+    partition_start = np.maximum.accumulate(np.where(new_partition, pos, 0))
+    run_start = np.maximum.accumulate(np.where(new_value, pos, 0))
+    ranks = np.empty(n, dtype=np.int64)
+    ranks[order] = run_start - partition_start + 1
+    return ranks
+
+
+def _fetch_columns(conn, sql, dtypes):
+    rows = conn.execute(sql).fetchall()
+    return [np.array([row[i] for row in rows], dtype=dtype) for i, dtype in enumerate(dtypes)]
+
+
+def _by_id(ids, values, dtype):
+    """Scatter ``values`` into an array indexed by ``ids`` (IDs are small positive integers)."""
+    out = np.empty(int(ids.max(initial=0)) + 1, dtype=dtype)
+    if dtype is object:
+        out[:] = None
+    out[ids] = values
+    return out
+
+
+class ColumnarEngine:
+    """Column arrays of one normalized database and the reports computed from them."""
+
+    def __init__(self, conn):
+        region_id, region = _fetch_columns(conn, "SELECT RegionID, Region FROM Region", (np.int64, object))
+        country_id, country, country_region = _fetch_columns(
+            conn, "SELECT CountryID, Country, RegionID FROM Country", (np.int64, object, np.int64)
+        )
+        customer_id, first_name, last_name, customer_country = _fetch_columns(
+            conn,
+            "SELECT CustomerID, FirstName, LastName, CountryID FROM Customer",
+            (np.int64, object, object, np.int64),
+        )
+        product_id, price = _fetch_columns(
+            conn, "SELECT ProductID, ProductUnitPrice FROM Product", (np.int64, np.float64)
+        )
+        date_id, date_text, year, quarter, month, month_name, day_number = _fetch_columns(
+            conn,
+            "SELECT DateID, Date, Year, Quarter, MonthNum, MonthName, DayNumber FROM Date ORDER BY DateID",
+            (np.int64, object, np.int64, np.int64, np.int64, object, np.int64),
+        )
+        order_customer, order_product, quantity, order_date_id = _fetch_columns(
+            conn,
+            """
+            SELECT o.CustomerID, o.ProductID, o.QuantityOrdered, d.DateID
+            FROM OrderDetail o JOIN Date d ON o.OrderDate = d.Date
+            """,
+            (np.int64, np.int64, np.int64, np.int64),
+        )
+
+        self.region_name = _by_id(region_id, region, object)
+        self.country_name = _by_id(country_id, country, object)
+        self.country_region = _by_id(country_id, country_region, np.int64)
+        self.customer_name = _by_id(
+            customer_id, np.array([f"{f} {l}" for f, l in zip(first_name, last_name)], dtype=object), object
+        )
+        self.customer_first = _by_id(customer_id, first_name, object)
+        self.customer_last = _by_id(customer_id, last_name, object)
+        self.customer_country = _by_id(customer_id, customer_country, np.int64)
+        self.product_price = _by_id(product_id, price, np.float64)
+
+        # Date columns are indexed by a dense date code (position in DateID order).
+        self.date_text = date_text
+        self.date_year = year
+        self.date_quarter = quarter
+        self.date_month = month
+        self.date_month_name = month_name
+        self.date_day_number = day_number
+
+        # Fact columns, one entry per OrderDetail row.
+        self.order_customer = order_customer
+        self.order_date = np.searchsorted(date_id, order_date_id)
+        self.order_quantity = quantity
+        self.order_total = self.product_price[order_product] * quantity
+        self.order_country = self.customer_country[order_customer]
+        self.order_region = self.country_region[self.order_country]
+
+    @classmethod
+    def from_database(cls, normalized_database_filename):
+        mini_project2._ensure_orderdetail_table(normalized_database_filename)
+        with mini_project2.pooled_connection(normalized_database_filename) as conn:
+            return cls(conn)
+
+    def report(self, name):
+        """Return the rows of report ``name`` ("ex3" ... "ex11")."""
+        return getattr(self, name)()
+
+    def _totals(self, keys, size):
+        totals = np.bincount(keys, weights=self.order_total, minlength=size)
+        present = np.flatnonzero(np.bincount(keys, minlength=size))
+        return present, totals[present]
+
+    def ex3(self):
+        ids, totals = self._totals(self.order_customer, len(self.customer_name))
+        order = np.argsort(-totals, kind="stable")
+        return list(zip(self.customer_name[ids[order]].tolist(), _sql_round(totals[order], 2).tolist()))
+
+    def ex4(self):
+        ids, totals = self._totals(self.order_region, len(self.region_name))
+        order = np.argsort(-totals, kind="stable")
+        return list(zip(self.region_name[ids[order]].tolist(), _sql_round(totals[order], 2).tolist()))
+
+    def ex5(self):
+        ids, totals = self._totals(self.order_country, len(self.country_name))
+        order = np.argsort(-totals, kind="stable")
+        return list(zip(self.country_name[ids[order]].tolist(), _sql_round(totals[order], 0).tolist()))
+
+    def _ranked_countries(self):
+        ids, totals = self._totals(self.order_country, len(self.country_name))
+        regions = self.region_name[self.country_region[ids]]
+        # Partition on the region name, as the SQL does.
+        _, region_code = np.unique(regions.astype(str), return_inverse=True)
+        ranks = _rank_desc(region_code, totals)
+        order = np.lexsort((ranks, region_code))
+        return regions[order], self.country_name[ids[order]], _sql_round(totals[order], 0), ranks[order]
+
+    def ex6(self):
+        regions, countries, totals, ranks = self._ranked_countries()
+        return list(zip(regions.tolist(), countries.tolist(), totals.tolist(), ranks.tolist()))
+
+    def ex7(self):
+        regions, countries, totals, ranks = self._ranked_countries()
+        top = ranks == 1
+        return list(zip(regions[top].tolist(), countries[top].tolist(), totals[top].tolist(), ranks[top].tolist()))
+
+    def _customer_quarter_totals(self):
+        """Sorted (year, quarter, customer) groups and their unrounded totals."""
+        n_customers = len(self.customer_name)
+        year_quarter = self.date_year[self.order_date] * 4 + self.date_quarter[self.order_date] - 1
+        keys, inverse = np.unique(year_quarter * n_customers + self.order_customer, return_inverse=True)
+        totals = np.bincount(inverse, weights=self.order_total)
+        year_quarter, customers = np.divmod(keys, n_customers)
+        years, quarters = np.divmod(year_quarter, 4)
+        return years, quarters + 1, customers, totals
+
+    def ex8(self):
+        years, quarters, customers, totals = self._customer_quarter_totals()
+        return list(zip(
+            [f"Q{q}" for q in quarters.tolist()], years.tolist(), customers.tolist(),
+            _sql_round(totals, 0).tolist(),
+        ))
+
+    def ex9(self):
+        years, quarters, customers, totals = self._customer_quarter_totals()
+        ranks = _rank_desc(years * 4 + quarters, totals)
+        top = np.flatnonzero(ranks <= 5)
+        top = top[np.lexsort((ranks[top], quarters[top], years[top]))]
+        return list(zip(
+            [f"Q{q}" for q in quarters[top].tolist()], years[top].tolist(), customers[top].tolist(),
+            _sql_round(totals[top], 0).tolist(), ranks[top].tolist(),
+        ))
+
+    def ex10(self):
+        months = self.date_month[self.order_date]
+        totals = np.bincount(months, weights=_sql_round(self.order_total, 0), minlength=13)
+        present = np.flatnonzero(np.bincount(months, minlength=13))
+        totals = totals[present]
+        ranks = _rank_desc(np.zeros(len(present), dtype=np.int64), totals)
+        order = np.argsort(ranks, kind="stable")
+        names = {m: n for m, n in zip(self.date_month.tolist(), self.date_month_name.tolist())}
+        return list(zip(
+            [names[m] for m in present[order].tolist()], totals[order].tolist(), ranks[order].tolist(),
+        ))
+
+    def ex11(self):
+        days = self.date_day_number[self.order_date]
+        order = np.lexsort((days, self.order_customer))
+        customers = self.order_customer[order]
+        dates = self.order_date[order]
+        days = days[order]
+        # Position i pairs an order with the one before it for the same customer.
+        gap_at = np.flatnonzero(customers[1:] == customers[:-1]) + 1
+        gaps = days[gap_at] - days[gap_at - 1]
+        gap_customers = customers[gap_at]
+        best = np.lexsort((-gaps, gap_customers))
+        first = np.r_[True, gap_customers[best][1:] != gap_customers[best][:-1]]
+        best = best[first]
+        best = best[np.lexsort((-gap_customers[best], -gaps[best]))]
+
+        ids = gap_customers[best]
+        at = gap_at[best]
+        return list(zip(
+            ids.tolist(),
+            self.customer_first[ids].tolist(),
+            self.customer_last[ids].tolist(),
+            self.country_name[self.customer_country[ids]].tolist(),
+            self.date_text[dates[at]].tolist(),
+            self.date_text[dates[at - 1]].tolist(),
+            gaps[best].astype(np.float64).tolist(),
+        ))
+
+
+# Engines built by load_engine, keyed by database path and remembered with the
+# database version they were loaded at.
+_ENGINE_CACHE = OrderedDict()
+_ENGINE_CACHE_MAXSIZE = 4
+_ENGINE_CACHE_LOCK = threading.Lock()
+
+
+def load_engine(normalized_database_filename):
+    """Return a ``ColumnarEngine`` for the database, reloading it only after the file changes."""
+    key = os.path.abspath(normalized_database_filename)
+    version = mini_project2._database_version(normalized_database_filename)
+    with _ENGINE_CACHE_LOCK:
+        cached = _ENGINE_CACHE.get(key)
+        if cached is not None and cached[0] == version:
+            _ENGINE_CACHE.move_to_end(key)
+            return cached[1]
+
+    engine = ColumnarEngine.from_database(normalized_database_filename)
+    with _ENGINE_CACHE_LOCK:
+        _ENGINE_CACHE[key] = (version, engine)
+        _ENGINE_CACHE.move_to_end(key)
+        while len(_ENGINE_CACHE) > _ENGINE_CACHE_MAXSIZE:
+            _ENGINE_CACHE.popitem(last=False)
+    return engine
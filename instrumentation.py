@@ -0,0 +1,161 @@
+"""Opt-in timing for the database build and the ex reports.
+
+Pass a ``Metrics`` to ``build_normalized_database``, ``ingest_new_orders`` or
+``run_report`` (or install one for every call, step functions included, with
+``mini_project2.set_default_metrics``)::
+
+    metrics = Metrics(callback=print)
+    build_normalized_database("data.csv", "normalized.db", metrics=metrics)
+    metrics.to_json("build_metrics.json")
+
+Each stage records its wall time and row counts. While a stage runs on a
+connection, SQLite's trace and progress hooks attribute time and VM steps to
+every statement it executes; statements are grouped by their text with the
+literals replaced by ``?``.
+"""
+import json
+import re
+import time
+from contextlib import contextmanager, nullcontext
+
+# SQLite VM instructions between progress handler calls.
+_PROGRESS_INTERVAL = 1000
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and replace string and number literals with ``?``."""
+    return _WHITESPACE.sub(" ", _LITERAL.sub("?", sql)).strip()
+
+
+class Stage:
+    """Counters of one stage; the instrumented code fills in the row counts."""
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.rows_parsed = 0
+        self.rows_inserted = 0
+        self.rows_returned = 0
+        self.statements = {}
+
+    @property
+    def rows_per_second(self):
+        rows = max(self.rows_parsed, self.rows_inserted, self.rows_returned)
+        return rows / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "seconds": self.seconds,
+            "rows_parsed": self.rows_parsed,
+            "rows_inserted": self.rows_inserted,
+            "rows_returned": self.rows_returned,
+            "rows_per_second": self.rows_per_second,
+            "statements": [
+                {"sql": sql, "count": count, "seconds": seconds, "vm_steps": vm_steps}
+                for sql, (count, seconds, vm_steps) in sorted(
+                    self.statements.items(), key=lambda item: item[1][1], reverse=True
+                )
+            ],
+        }
+
+
+class _SqlTracer:
+    """Attributes wall time and VM steps to the statements run on ``conn``.
+
+    SQLite only reports when a statement starts, so a statement's time runs
+    until the next one starts or the stage ends; for executemany that
+    includes producing the next row of parameters.
+    """
+
+    def __init__(self, conn, stage):
+        self._conn = conn
+        self._stage = stage
+        self._current = None
+        self._started = 0.0
+        self._vm_steps = 0
+
+    def __enter__(self):
+        self._conn.set_trace_callback(self._on_statement)
+        self._conn.set_progress_handler(self._on_progress, _PROGRESS_INTERVAL)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._conn.set_trace_callback(None)
+        self._conn.set_progress_handler(None, _PROGRESS_INTERVAL)
+        self._finish(time.perf_counter())
+
+    def _on_statement(self, sql):
+        now = time.perf_counter()
+        self._finish(now)
+        self._current = normalize_sql(sql)
+        self._started = now
+        self._vm_steps = 0
+
+    def _on_progress(self):
+        self._vm_steps += _PROGRESS_INTERVAL
+        return 0
+
+    def _finish(self, now):
+        if self._current is None:
+            return
+        count, seconds, vm_steps = self._stage.statements.get(self._current, (0, 0.0, 0))
+        self._stage.statements[self._current] = (
+            count + 1, seconds + now - self._started, vm_steps + self._vm_steps
+        )
+        self._current = None
+
+
+class Metrics:
+    """Collects ``Stage`` records and exports them as JSON or through ``callback``.
+
+    ``callback`` is called with each stage's ``to_dict()`` as soon as the
+    stage ends. ``trace_sql=False`` skips the per-statement hooks, which cost
+    a Python call for every statement execution.
+    """
+
+    def __init__(self, callback=None, trace_sql=True):
+        self.stages = []
+        self._callback = callback
+        self._trace_sql = trace_sql
+
+    @contextmanager
+    def stage(self, name, conn=None):
+        """Time the block as stage ``name``, tracing SQL run on ``conn``."""
+        stage = Stage(name)
+        tracer = _SqlTracer(conn, stage) if conn is not None and self._trace_sql else nullcontext()
+        start = time.perf_counter()
+        try:
+            with tracer:
+                yield stage
+        finally:
+            stage.seconds = time.perf_counter() - start
+            self.stages.append(stage)
+            if self._callback is not None:
+                self._callback(stage.to_dict())
+
+    def to_dict(self):
+        return {
+            "total_seconds": sum(stage.seconds for stage in self.stages),
+            "stages": [stage.to_dict() for stage in self.stages],
+        }
+
+    def to_json(self, path=None):
+        """Return the metrics as JSON text, also writing it to ``path`` if given."""
+        text = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+
+class _NullMetrics:
+    """Stands in when instrumentation is off; stages cost one context manager."""
+
+    def stage(self, name, conn=None):
+        return nullcontext(Stage(name))
+
+
+NULL_METRICS = _NullMetrics()
@@ -1,6 +1,119 @@
+import argparse
+import gzip
+
 import pandas as pd
 
+FLAT_COLUMNS = [
+    "customer_name","address","city","country","region",
+    "product_name","product_category","product_category_description",
+    "product_unit_price","quantity_ordered","order_date"
+]
+
+# Source columns holding one ";"-separated value per line item, in output order.
+_LINE_ITEM_COLUMNS = [
+    "ProductName", "ProductCategory", "ProductCategoryDescription",
+    "ProductUnitPrice", "QuantityOrderded", "OrderDate",
+]
+_CUSTOMER_COLUMNS = ["Name", "Address", "City", "Country", "Region"]
+# Every source column is text; reading it as such keeps the dtypes the same from chunk to chunk.
+_READ_DTYPES = {col: str for col in _CUSTOMER_COLUMNS + _LINE_ITEM_COLUMNS}
+
+# Source rows flattened at a time by export_orders; memory is bounded by this, not the file size.
+DEFAULT_CHUNKSIZE = 50000
+EXPORT_FORMATS = ("csv", "parquet")
+
+
 def make_orders_dataframe(csv_path: str) -> pd.DataFrame:
+    return _flatten(pd.read_csv(csv_path, sep="\t", dtype=_READ_DTYPES))
+
+
+def _flatten(raw: pd.DataFrame) -> pd.DataFrame:
+    items = raw[_CUSTOMER_COLUMNS].copy()
+    for col in _LINE_ITEM_COLUMNS:
+        items[col] = raw[col].str.split(";")
+    # Every line-item column holds the same number of values per order, so they explode together.
+    items = items.explode(_LINE_ITEM_COLUMNS, ignore_index=True)
+
+    items["ProductUnitPrice"] = items["ProductUnitPrice"].astype(float)
+    items["QuantityOrderded"] = items["QuantityOrderded"].astype(int)
+    items["OrderDate"] = pd.to_datetime(items["OrderDate"], format="%Y%m%d").dt.strftime("%Y-%m-%d")
+
+    items.columns = FLAT_COLUMNS
+    return items
+
+
+def _format_for(out_path: str) -> str:
+    return "parquet" if str(out_path).endswith(".parquet") else "csv"
+
+
+class _CsvSink:
+    # Writes the header with the first chunk only; a ".gz" path is gzip-compressed.
+    def __init__(self, out_path):
+        if str(out_path).endswith(".gz"):
+            self._f = gzip.open(out_path, "wt", newline="")
+        else:
+            self._f = open(out_path, "w", newline="")
+        self._header = True
+
+    def write(self, df):
+        df.to_csv(self._f, index=False, header=self._header)
+        self._header = False
+
+    def close(self):
+        self._f.close()
+
+
+class _ParquetSink:
+    # One row group per chunk, zstd-compressed.
+    def __init__(self, out_path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("parquet output requires pyarrow (pip install pyarrow)") from e
+        self._pa = pa
+        self._schema = pa.schema([
+            (col, pa.float64() if col == "product_unit_price"
+             else pa.int64() if col == "quantity_ordered" else pa.string())
+            for col in FLAT_COLUMNS
+        ])
+        self._writer = pq.ParquetWriter(out_path, self._schema, compression="zstd")
+
+    def write(self, df):
+        table = self._pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        self._writer.write_table(table)
+
+    def close(self):
+        self._writer.close()
+
+
+def export_orders(csv_path: str, out_path: str, fmt: str = None, chunksize: int = DEFAULT_CHUNKSIZE) -> int:
+    """Stream ``csv_path`` into the flat line-item file ``out_path``.
+
+    The source is read ``chunksize`` rows at a time; each chunk is flattened
+    and appended, so memory use does not grow with the file. ``fmt`` is one of
+    ``EXPORT_FORMATS`` and defaults to parquet for a ``.parquet`` path and CSV
+    otherwise. Returns the number of line items written.
+    """
+    fmt = fmt or _format_for(out_path)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}, expected one of {EXPORT_FORMATS}")
+    sink = _ParquetSink(out_path) if fmt == "parquet" else _CsvSink(out_path)
+    written = 0
+    try:
+        for raw in pd.read_csv(csv_path, sep="\t", dtype=_READ_DTYPES, chunksize=chunksize):
+            items = _flatten(raw)
+            sink.write(items)
+            written += len(items)
+        if written == 0:
+            sink.write(pd.DataFrame(columns=FLAT_COLUMNS))
+    finally:
+        sink.close()
+    return written
+
+
+def _make_orders_dataframe_rowwise(csv_path: str) -> pd.DataFrame:
+    # Original row-by-row flattener, kept as the reference for tests and benchmark.py.
     raw = pd.read_csv(csv_path, sep="\t")
 
     rows = []
@@ -29,13 +142,21 @@ def make_orders_dataframe(csv_path: str) -> pd.DataFrame:
                 int(qtys[i]),
                 date_sql,
             ])
-    df = pd.DataFrame(rows, columns=[
-        "customer_name","address","city","country","region",
-        "product_name","product_category","product_category_description",
-        "product_unit_price","quantity_ordered","order_date"
-    ])
+    df = pd.DataFrame(rows, columns=FLAT_COLUMNS)
     return df
 
-df = make_orders_dataframe("data.csv")
-df.to_csv("orders_flat.csv", index=False)
-print("orders_flat.csv created:", len(df), "rows")
+
+def main():
+    parser = argparse.ArgumentParser(description="Flatten data.csv into one row per line item.")
+    parser.add_argument("csv_path", nargs="?", default="data.csv")
+    parser.add_argument("out_path", nargs="?", default="orders_flat.csv")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default=None)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args()
+
+    written = export_orders(args.csv_path, args.out_path, fmt=args.format, chunksize=args.chunksize)
+    print(f"{args.out_path} created:", written, "rows")
+
+
+if __name__ == "__main__":
+    main()
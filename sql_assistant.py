@@ -0,0 +1,777 @@
+"""Database and model plumbing behind the Streamlit assistant in app.py.
+
+app.py runs Streamlit code at import time, so everything that can be tested
+without a browser session lives here.
+"""
+import functools
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+
+import pandas as pd
+import psycopg2
+import psycopg2.errors
+
+# Errors after which a connection cannot be trusted and is closed instead of reused.
+_BROKEN_CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class PoolTimeout(Exception):
+    """No connection became free within the checkout timeout."""
+
+
+class PostgresPool:
+    """Thread-safe pool of database connections checked out per request.
+
+    ``connect`` opens a new connection (e.g. ``functools.partial(psycopg2.connect, ...)``).
+    At most ``maxconn`` connections exist at once; ``connection()`` waits up to
+    ``timeout`` seconds for one to come back before raising ``PoolTimeout``.
+    A connection idle for more than ``health_check_interval`` seconds is
+    pinged with ``SELECT 1`` before it is handed out and replaced if that
+    fails. Every checkout ends its transaction when it is returned, so a
+    failed query never leaves the next user in an aborted transaction.
+    """
+
+    def __init__(self, connect, minconn=1, maxconn=10, timeout=30.0, health_check_interval=30.0):
+        if not 0 <= minconn <= maxconn or maxconn < 1:
+            raise ValueError("need 0 <= minconn <= maxconn and maxconn >= 1")
+        self._connect = connect
+        self._maxconn = maxconn
+        self._timeout = timeout
+        self._health_check_interval = health_check_interval
+        self._available = threading.Condition()
+        # Idle connections as (connection, time it was returned), most recent last.
+        self._idle = []
+        self._open = 0
+        self._closed = False
+        for _ in range(minconn):
+            self._idle.append((self._new_connection(), time.monotonic()))
+
+    def _new_connection(self):
+        conn = self._connect()
+        self._open += 1
+        return conn
+
+    def _discard(self, conn):
+        with self._available:
+            self._open -= 1
+            self._available.notify()
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn, idle_since):
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self._health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+                cur.fetchone()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _checkout(self):
+        deadline = time.monotonic() + self._timeout
+        while True:
+            with self._available:
+                while not self._idle and self._open >= self._maxconn:
+                    if self._closed:
+                        raise PoolTimeout("pool is closed")
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(f"no connection free after {self._timeout}s")
+                    self._available.wait(remaining)
+                if self._closed:
+                    raise PoolTimeout("pool is closed")
+                if not self._idle:
+                    # Reserve the slot, then connect outside the lock.
+                    self._open += 1
+                    idle = None
+                else:
+                    idle = self._idle.pop()
+            if idle is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._available:
+                        self._open -= 1
+                        self._available.notify()
+                    raise
+            conn, idle_since = idle
+            if self._is_healthy(conn, idle_since):
+                return conn
+            # Reconnect: drop the dead connection and try again with its slot free.
+            self._discard(conn)
+
+    def _checkin(self, conn, failed):
+        if not conn.closed:
+            try:
+                conn.rollback()
+            except Exception:
+                failed = True
+        if failed or conn.closed:
+            self._discard(conn)
+            return
+        with self._available:
+            if self._closed:
+                self._open -= 1
+                conn.close()
+                return
+            self._idle.append((conn, time.monotonic()))
+            self._available.notify()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for one request and return it when the block ends."""
+        conn = self._checkout()
+        broken = False
+        try:
+            yield conn
+        except _BROKEN_CONNECTION_ERRORS as e:
+            # A cancelled statement (e.g. statement_timeout) leaves the connection usable.
+            broken = not isinstance(e, psycopg2.errors.QueryCanceled)
+            raise
+        finally:
+            self._checkin(conn, broken)
+
+    def close(self):
+        """Close the idle connections; connections still checked out close on return."""
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._available.notify_all()
+        for conn, _ in idle:
+            conn.close()
+
+
+class SingleFlight:
+    """Runs blocking calls on a bounded thread pool, one call per key at a time.
+
+    ``do(key, fn, ...)`` submits ``fn`` to an executor of ``max_workers``
+    threads and waits for it. A caller asking for a key that is already in
+    flight waits on that call instead of starting another, and gets its
+    result (or exception) too. Results are not kept once the call finishes;
+    that is the job of the caches. ``run(fn, ...)`` uses the same executor
+    without coalescing.
+    """
+
+    def __init__(self, max_workers=8):
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="assistant")
+        self._lock = threading.Lock()
+        # key -> [Future of the call in flight, number of callers waiting on it]
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        """Return ``(result, shared)``; ``shared`` is True when another caller's call produced it."""
+        with self._lock:
+            call = self._calls.get(key)
+            shared = call is not None
+            if shared:
+                call[1] += 1
+            else:
+                call = self._calls[key] = [self._executor.submit(fn, *args, **kwargs), 1]
+        future = call[0]
+        if not shared:
+            future.add_done_callback(functools.partial(self._forget, key))
+        return future.result(), shared
+
+    def run(self, fn, *args, **kwargs):
+        """Run ``fn`` on the executor and wait for its result."""
+        return self._executor.submit(fn, *args, **kwargs).result()
+
+    def in_flight(self, key=None):
+        """Callers waiting on ``key``'s call, or on any call when ``key`` is None."""
+        with self._lock:
+            if key is not None:
+                return self._calls[key][1] if key in self._calls else 0
+            return sum(count for _, count in self._calls.values())
+
+    def _forget(self, key, future):
+        with self._lock:
+            if key in self._calls and self._calls[key][0] is future:
+                del self._calls[key]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def clean_sql(text):
+    """Strip the fences, prefixes and semicolon the model wraps around its SQL."""
+    sql = text.strip()
+
+    sql = sql.replace("```sql", "")
+    sql = sql.replace("```", "")
+    sql = sql.replace("`", "")
+    sql = sql.strip()
+
+    # Remove accidental "sql " prefix
+    if sql.lower().startswith("sql "):
+        sql = sql[4:].strip()
+
+    if sql.lower().startswith("sql\n"):
+        sql = sql[4:].strip()
+
+    # Remove semicolon
+    sql = sql.rstrip(";").strip()
+
+    # 🛑 SAFETY PATCH: Fix hallucinated id column
+    sql = sql.replace("COUNT(id)", "COUNT(*)")
+    sql = sql.replace("count(id)", "COUNT(*)")
+
+    return sql
+
+
+def nl_to_sql(model, system_prompt, prompt, cache=None, flights=None):
+    """Convert English → SQL with ``model``, reusing ``cache`` (a ``PromptCache``) when given.
+
+    With ``flights`` (a ``SingleFlight``) the model is called on its executor,
+    and concurrent calls for the same normalized prompt share one model call.
+    """
+    if cache is not None:
+        sql = cache.get(prompt)
+        if sql is not None:
+            return sql
+    if flights is not None:
+        key = ("nl_to_sql", prompt_version(system_prompt, getattr(model, "model_name", "")), normalize_prompt(prompt))
+        return flights.do(key, _generate_sql, model, system_prompt, prompt, cache)[0]
+    return _generate_sql(model, system_prompt, prompt, cache)
+
+
+def _generate_sql(model, system_prompt, prompt, cache):
+    response = model.generate_content(system_prompt + "\nUser Prompt: " + prompt)
+    sql = clean_sql(response.text)
+    if cache is not None:
+        cache.put(prompt, sql)
+    return sql
+
+
+_PROMPT_SPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt):
+    """Fold case, whitespace and trailing punctuation so near-identical questions share a key."""
+    return _PROMPT_SPACE.sub(" ", prompt).strip().rstrip("?.!").strip().casefold()
+
+
+def prompt_version(system_prompt, model_name=""):
+    """Token that changes whenever the system prompt or the model does."""
+    return hashlib.sha256(f"{model_name}\0{system_prompt}".encode("utf-8")).hexdigest()[:16]
+
+
+class PromptCache:
+    """Prompt → cleaned SQL, in an in-memory LRU in front of an optional SQLite file.
+
+    Keys are the normalized prompt under ``version`` (see ``prompt_version``),
+    so editing SYSTEM_PROMPT or switching models starts from an empty cache;
+    rows of other versions are deleted when the file is opened. Entries older
+    than ``ttl`` seconds count as misses. The memory tier keeps ``maxsize``
+    entries and the file ``max_disk_entries``, evicting the least recently used.
+    """
+
+    def __init__(self, path=None, version="", maxsize=256, ttl=7 * 24 * 3600,
+                 max_disk_entries=10000, clock=time.time):
+        self.version = version
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._max_disk_entries = max_disk_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        # normalized prompt -> (created_at, sql)
+        self._memory = OrderedDict()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS prompt_sql (
+                    version text NOT NULL,
+                    prompt text NOT NULL,
+                    sql text NOT NULL,
+                    created_at real NOT NULL,
+                    last_used real NOT NULL,
+                    PRIMARY KEY (version, prompt)
+                )
+                """
+            )
+            self._db.execute("DELETE FROM prompt_sql WHERE version != ?", (version,))
+            self._db.commit()
+
+    def _expired(self, created_at):
+        return self._ttl is not None and self._clock() - created_at > self._ttl
+
+    def _remember(self, key, created_at, sql):
+        self._memory[key] = (created_at, sql)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._maxsize:
+            self._memory.popitem(last=False)
+
+    def get(self, prompt):
+        """Return the cached SQL for ``prompt``, or None."""
+        key = normalize_prompt(prompt)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self._memory.move_to_end(key)
+                    return entry[1]
+                del self._memory[key]
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT created_at, sql FROM prompt_sql WHERE version = ? AND prompt = ?",
+                (self.version, key),
+            ).fetchone()
+            if row is None:
+                return None
+            if self._expired(row[0]):
+                self._db.execute("DELETE FROM prompt_sql WHERE version = ? AND prompt = ?", (self.version, key))
+                self._db.commit()
+                return None
+            self._db.execute(
+                "UPDATE prompt_sql SET last_used = ? WHERE version = ? AND prompt = ?",
+                (self._clock(), self.version, key),
+            )
+            self._db.commit()
+            self._remember(key, row[0], row[1])
+            return row[1]
+
+    def put(self, prompt, sql):
+        key = normalize_prompt(prompt)
+        now = self._clock()
+        with self._lock:
+            self._remember(key, now, sql)
+            if self._db is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO prompt_sql (version, prompt, sql, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (self.version, key, sql, now, now),
+            )
+            self._db.execute(
+                """
+                DELETE FROM prompt_sql WHERE rowid IN (
+                    SELECT rowid FROM prompt_sql ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self._max_disk_entries,),
+            )
+            self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+# Changes whenever rows of any user table are written, or a table is dropped and
+# recreated: each table contributes its OID (new for a recreated table, even one
+# reloaded with the same row count) and its own write counters, which TRUNCATE does
+# not reset. Postgres' cumulative statistics lag commits by at most a second or so,
+# far below our reload cadence. Point DATA_VERSION_SQL at an explicit load marker
+# where loads can bypass these counters.
+DEFAULT_DATA_VERSION_SQL = """
+SELECT md5(COALESCE(string_agg(
+    relid::text || ':' || n_tup_ins || ':' || n_tup_upd || ':' || n_tup_del, ',' ORDER BY relid
+), ''))
+FROM pg_stat_user_tables
+"""
+
+_SQL_QUOTED = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+
+
+def canonicalize_sql(sql):
+    """Fold case and whitespace outside quoted strings and identifiers, and drop a trailing ";"."""
+    parts = _SQL_QUOTED.split(sql.strip().rstrip(";"))
+    # split() with one capturing group alternates unquoted and quoted text.
+    return "".join(
+        part if i % 2 else _PROMPT_SPACE.sub(" ", part).casefold() for i, part in enumerate(parts)
+    ).strip()
+
+
+class ResultCache:
+    """Query results keyed by canonical SQL and the data version they were read at.
+
+    The version token comes from ``version_sql`` and is re-read at most every
+    ``version_ttl`` seconds, so a reload shows up within that window. Entries
+    are evicted least recently used first once their DataFrames' deep memory
+    use passes ``max_bytes``; a single result bigger than that is not cached.
+    Cached DataFrames are shared, so callers must not modify them.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, version_sql=DEFAULT_DATA_VERSION_SQL,
+                 version_ttl=5.0, clock=time.monotonic):
+        self._max_bytes = max_bytes
+        self._version_sql = version_sql
+        self._version_ttl = version_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (canonical sql, version) -> (DataFrame, bytes)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._version = None
+        self._version_read_at = None
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    def data_version(self, conn):
+        """Return the current data version token, querying ``conn`` only when it is stale."""
+        now = self._clock()
+        with self._lock:
+            if self._version_read_at is not None and now - self._version_read_at < self._version_ttl:
+                return self._version
+        with conn.cursor() as cur:
+            cur.execute(self._version_sql)
+            version = cur.fetchone()
+        with self._lock:
+            self._version, self._version_read_at = version, now
+        return version
+
+    def get(self, sql, version):
+        key = (canonicalize_sql(sql), version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, sql, version, df):
+        size = int(df.memory_usage(deep=True).sum())
+        if size > self._max_bytes:
+            return
+        key = (canonicalize_sql(sql), version)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (df, size)
+            self._bytes += size
+            while self._bytes > self._max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+
+# Rows fetched per round trip, and the most rows a result may load in total.
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_MAX_ROWS = 100000
+
+
+class QueryRejected(Exception):
+    """The guard refused to run a statement; the message explains why to the user."""
+
+
+# Postgres planner cost units; a sequential page read costs 1.
+DEFAULT_MAX_COST = 1000000.0
+DEFAULT_STATEMENT_TIMEOUT = 30.0
+
+_SQL_TOKEN = re.compile(
+    r"""
+      (?P<space>\s+)
+    | (?P<comment>--[^\n]*|/\*.*?\*/)
+    | (?P<string>'(?:[^']|'')*'|\$(?P<tag>(?:[A-Za-z_]\w*)?)\$.*?\$(?P=tag)\$)
+    | (?P<identifier>"(?:[^"]|"")*")
+    | (?P<word>[A-Za-z_][\w$]*)
+    | (?P<other>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+# Keywords that only appear in statements which write, lock or change settings.
+_FORBIDDEN_WORDS = frozenset("""
+    insert update delete merge upsert create alter drop truncate rename grant revoke
+    copy call do execute prepare deallocate vacuum analyze cluster reindex refresh
+    lock listen notify unlisten set reset discard comment security into import
+""".split())
+_LOCKING_CLAUSES = frozenset(["update", "share", "no", "key"])
+_FORBIDDEN_FUNCTIONS = frozenset(["set_config", "nextval", "setval", "dblink", "dblink_exec"])
+_FORBIDDEN_FUNCTION_PREFIXES = ("pg_", "lo_")
+
+
+def _sql_tokens(sql):
+    """``(kind, lowercased text, offset, paren depth)`` for each token outside comments."""
+    tokens = []
+    depth = 0
+    for match in _SQL_TOKEN.finditer(sql):
+        kind = match.lastgroup if match.lastgroup != "tag" else "string"
+        text = match.group()
+        if kind in ("space", "comment"):
+            continue
+        if kind == "other" and text in "'\"":
+            raise QueryRejected("The query has an unterminated quoted string or identifier.")
+        if text == ")":
+            depth -= 1
+        tokens.append((kind, text.lower(), match.start(), depth))
+        if text == "(":
+            depth += 1
+    return tokens
+
+
+class SqlGuard:
+    """Vets generated SQL before it runs and bounds what running it may cost.
+
+    ``check`` accepts a single read-only SELECT (or WITH ... SELECT) and adds
+    ``LIMIT limit`` when the statement has no top-level LIMIT or FETCH.
+    ``prepare`` runs on the connection that will execute it: it makes the
+    transaction read-only, sets ``statement_timeout`` (seconds) for it, and asks
+    the planner for the statement's cost with EXPLAIN, rejecting anything over
+    ``max_cost``. Both raise ``QueryRejected`` with a message for the user.
+    """
+
+    def __init__(self, max_cost=DEFAULT_MAX_COST, limit=DEFAULT_MAX_ROWS + 1,
+                 statement_timeout=DEFAULT_STATEMENT_TIMEOUT):
+        self.max_cost = max_cost
+        self.limit = limit
+        self.statement_timeout = statement_timeout
+
+    def check(self, sql):
+        """Return ``sql`` as it will run, or raise ``QueryRejected``."""
+        tokens = _sql_tokens(sql)
+        while tokens and tokens[-1][1] == ";":
+            sql = sql[:tokens.pop()[2]]
+        if not tokens:
+            raise QueryRejected("The generated SQL is empty.")
+        if any(text == ";" for _, text, _, _ in tokens):
+            raise QueryRejected("The generated SQL contains more than one statement; only a single SELECT may run.")
+        first = next((text for kind, text, _, _ in tokens if text != "("), "")
+        if first not in ("select", "with"):
+            raise QueryRejected(f"Only SELECT queries may run; the generated SQL starts with {first.upper()!r}.")
+
+        words = [(i, text) for i, (kind, text, _, _) in enumerate(tokens) if kind == "word"]
+        for i, text in words:
+            following = tokens[i + 1][1] if i + 1 < len(tokens) else ""
+            if text in _FORBIDDEN_WORDS:
+                raise QueryRejected(f"The generated SQL uses {text.upper()}, which is not allowed in a read-only query.")
+            if text == "for" and following in _LOCKING_CLAUSES:
+                raise QueryRejected("The generated SQL locks rows (SELECT ... FOR UPDATE/SHARE), which is not allowed.")
+            if following == "(" and (text in _FORBIDDEN_FUNCTIONS or text.startswith(_FORBIDDEN_FUNCTION_PREFIXES)):
+                raise QueryRejected(f"The generated SQL calls {text}(), which is not allowed.")
+
+        limited = any(depth == 0 and text in ("limit", "fetch") for kind, text, _, depth in tokens if kind == "word")
+        if self.limit is not None and not limited:
+            # On its own line, so a trailing "--" comment cannot swallow it.
+            sql = f"{sql.rstrip()}\nLIMIT {int(self.limit)}"
+        return sql
+
+    def prepare(self, conn, sql):
+        """Bound the transaction on ``conn`` and reject ``sql`` if its plan is too expensive."""
+        with conn.cursor() as cur:
+            cur.execute("SET TRANSACTION READ ONLY")
+            if self.statement_timeout:
+                cur.execute(f"SET LOCAL statement_timeout = {int(self.statement_timeout * 1000)}")
+            cur.execute("EXPLAIN (FORMAT JSON) " + sql)
+            plan = cur.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        top = plan[0]["Plan"]
+        cost = top["Total Cost"]
+        if self.max_cost is not None and cost > self.max_cost:
+            raise QueryRejected(
+                f"This query is too expensive to run: the planner estimates a cost of {cost:,.0f} "
+                f"(limit {self.max_cost:,.0f}) to produce about {top.get('Plan Rows', 0):,} rows. "
+                "Ask a narrower question, e.g. filter by date, region or product, or ask for totals "
+                "instead of individual orders."
+            )
+        return cost
+
+
+class PagedResult:
+    """Rows of one query, loaded ``page_size`` at a time from a server-side cursor.
+
+    ``frame`` holds the rows fetched so far; ``fetch_more()`` appends the next
+    page. The pooled connection stays checked out until every row is read,
+    ``max_rows`` is reached or ``close()`` is called, so callers must close
+    results they abandon (a ``CursorReaper`` does it for them after a while;
+    it sets ``expired``). ``truncated`` is set when rows past ``max_rows`` were
+    left unread. A result built from a DataFrame alone is already complete.
+    """
+
+    def __init__(self, frame=None, from_cache=False, cursor=None, resources=None, sql=None,
+                 page_size=DEFAULT_PAGE_SIZE, max_rows=DEFAULT_MAX_ROWS, on_complete=None,
+                 clock=time.monotonic):
+        self.frame = frame
+        self.from_cache = from_cache
+        # Set on results handed to callers that joined an identical query in flight.
+        self.shared = False
+        self.sql = sql
+        self.truncated = False
+        self.expired = False
+        self._cursor = cursor
+        self._resources = resources
+        self._page_size = page_size
+        self._max_rows = max_rows
+        self._on_complete = on_complete
+        self._clock = clock
+        self.last_used = clock()
+        # fetch_more() runs on the script thread, expire() on the reaper's.
+        self._lock = threading.RLock()
+
+    @property
+    def complete(self):
+        """True once no more rows will be fetched."""
+        return self._cursor is None
+
+    def fetch_more(self):
+        """Fetch the next page into ``frame`` and return the number of new rows."""
+        with self._lock:
+            if self._cursor is None:
+                return 0
+            self.last_used = self._clock()
+            fetched = 0 if self.frame is None else len(self.frame)
+            limit = min(self._page_size, self._max_rows - fetched)
+            try:
+                rows = self._cursor.fetchmany(limit)
+                # Named cursors only describe their columns after the first fetch.
+                columns = [column[0] for column in self._cursor.description]
+                exhausted = len(rows) < limit
+                if not exhausted and fetched + len(rows) >= self._max_rows:
+                    self.truncated = self._cursor.fetchone() is not None
+                    exhausted = not self.truncated
+            except BaseException:
+                resources, self._resources, self._cursor = self._resources, None, None
+                resources.__exit__(*sys.exc_info())
+                raise
+            page = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+            self.frame = page if self.frame is None else pd.concat([self.frame, page], ignore_index=True)
+            if exhausted or self.truncated:
+                self.close()
+                if exhausted and self._on_complete is not None:
+                    self._on_complete(self.frame)
+            return len(rows)
+
+    def idle_seconds(self):
+        return self._clock() - self.last_used
+
+    def expire(self, idle_timeout):
+        """Close the result if it is still open and has been idle over ``idle_timeout`` seconds."""
+        with self._lock:
+            if self._cursor is None or self.idle_seconds() <= idle_timeout:
+                return False
+            self.expired = True
+            self.close()
+            return True
+
+    def close(self):
+        """Release the cursor and its connection; rows already fetched stay in ``frame``."""
+        with self._lock:
+            resources, self._resources, self._cursor = self._resources, None, None
+            if resources is not None:
+                resources.close()
+
+
+DEFAULT_IDLE_TIMEOUT = 120.0
+
+
+class CursorReaper:
+    """Closes ``PagedResult`` cursors nobody has fetched from for ``idle_timeout`` seconds.
+
+    An open result holds a pooled connection and an open transaction, with
+    its table locks, so a result left half-read in a closed tab would
+    otherwise keep them until the process exits. A daemon thread sweeps every
+    ``interval`` seconds (with ``interval=None`` only ``reap()`` calls do);
+    ``open_query`` sweeps too before it checks out a connection, and sets the
+    server's idle_in_transaction_session_timeout to twice ``idle_timeout`` as
+    a backstop for when this process cannot.
+    """
+
+    def __init__(self, idle_timeout=DEFAULT_IDLE_TIMEOUT, interval=10.0, clock=time.monotonic):
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._results = set()
+        self._stopped = threading.Event()
+        if interval is not None:
+            threading.Thread(target=self._run, args=(interval,), name="cursor-reaper", daemon=True).start()
+
+    def _run(self, interval):
+        while not self._stopped.wait(interval):
+            self.reap()
+
+    def track(self, result):
+        with self._lock:
+            self._results.add(result)
+
+    def reap(self):
+        """Close the results idle longer than ``idle_timeout``; returns how many were closed."""
+        with self._lock:
+            results = list(self._results)
+        expired = sum(result.expire(self.idle_timeout) for result in results)
+        with self._lock:
+            self._results = {r for r in self._results if not r.complete}
+        return expired
+
+    def stop(self):
+        self._stopped.set()
+
+
+def open_query(pool, sql, cache=None, guard=None, page_size=DEFAULT_PAGE_SIZE, max_rows=DEFAULT_MAX_ROWS,
+               flights=None, reaper=None):
+    """Start ``sql`` on a server-side cursor and fetch its first page; returns a ``PagedResult``.
+
+    With ``guard`` (a ``SqlGuard``) the statement is checked and bounded
+    first, and ``PagedResult.sql`` is the statement as it ran. With ``cache``
+    (a ``ResultCache``) a cached result comes back whole, and a result read to
+    the end without reaching ``max_rows`` is cached. With ``reaper`` (a
+    ``CursorReaper``) a result left open is closed once it has sat idle.
+
+    With ``flights`` (a ``SingleFlight``) the query opens on its executor and
+    concurrent calls for the same canonical SQL wait on one query. Those
+    callers get the rows as a ``shared`` result when the query fetched all it
+    will; otherwise each opens its own cursor, since a cursor cannot be shared.
+    """
+    if flights is not None:
+        key = ("open_query", canonicalize_sql(sql), page_size, max_rows)
+        result, shared = flights.do(key, open_query, pool, sql, cache, guard, page_size, max_rows, reaper=reaper)
+        if not shared:
+            return result
+        # Once complete, a result's frame no longer changes.
+        if result.complete:
+            follower = PagedResult(result.frame, from_cache=result.from_cache, sql=result.sql)
+            follower.truncated = result.truncated
+            follower.shared = True
+            return follower
+        return flights.run(open_query, pool, sql, cache, guard, page_size, max_rows, reaper=reaper)
+    if guard is not None:
+        sql = guard.check(sql)
+    if reaper is not None:
+        reaper.reap()
+    resources = ExitStack()
+    try:
+        conn = resources.enter_context(pool.connection())
+        version = None
+        if cache is not None:
+            version = cache.data_version(conn)
+            df = cache.get(sql, version)
+            if df is not None:
+                resources.close()
+                return PagedResult(df, from_cache=True, sql=sql)
+        if guard is not None:
+            guard.prepare(conn, sql)
+        if reaper is not None:
+            with conn.cursor() as cur:
+                cur.execute(f"SET LOCAL idle_in_transaction_session_timeout = {int(reaper.idle_timeout * 2000)}")
+        cursor = resources.enter_context(conn.cursor(name=f"assistant_{uuid.uuid4().hex}"))
+        cursor.execute(sql)
+    except BaseException:
+        resources.__exit__(*sys.exc_info())
+        raise
+    on_complete = functools.partial(cache.put, sql, version) if cache is not None else None
+    result = PagedResult(cursor=cursor, resources=resources, sql=sql, page_size=page_size, max_rows=max_rows,
+                         on_complete=on_complete, clock=reaper.clock if reaper is not None else time.monotonic)
+    result.fetch_more()
+    if reaper is not None and not result.complete:
+        reaper.track(result)
+    return result
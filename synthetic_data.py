@@ -0,0 +1,138 @@
+"""Deterministic synthetic data.csv generator for benchmarks.
+
+Usage: python synthetic_data.py out.csv [--customers N] [--items-per-customer N]
+       [--products N] [--categories N] [--start-date YYYY-MM-DD] [--end-date YYYY-MM-DD] [--seed N]
+
+Files have the data.csv layout: one tab-separated row per customer with the
+customer's line items joined by ";". The same arguments always produce the
+same bytes. Rows are generated and written in blocks, so memory use does not
+depend on the number of customers.
+"""
+import argparse
+from datetime import date
+
+import numpy as np
+
+HEADER = [
+    "Name", "Address", "City", "Country", "Region", "ProductName", "ProductCategory",
+    "ProductCategoryDescription", "ProductUnitPrice", "QuantityOrderded", "OrderDate",
+]
+
+REGIONS = {
+    "British Isles": ["UK", "Ireland"],
+    "Central America": ["Mexico", "Guatemala"],
+    "North America": ["USA", "Canada"],
+    "Scandinavia": ["Sweden", "Norway", "Denmark", "Finland"],
+    "South America": ["Brazil", "Argentina", "Venezuela"],
+    "Southern Europe": ["Spain", "Italy", "Portugal"],
+    "Western Europe": ["Germany", "France", "Belgium", "Switzerland", "Austria"],
+}
+
+FIRST_NAMES = [
+    "Ana", "Anna", "Bo", "Carlos", "Christina", "Ed", "Elizabeth", "Eve", "Frederique", "Hanna",
+    "Jose", "Liu", "Maria", "Martin", "Patricio", "Paul", "Pedro", "Thomas", "Yang", "Zoe",
+]
+
+# Customers generated per block before the rows are written out.
+_BLOCK_SIZE = 1000
+
+
+def _day_strings(start_date, end_date):
+    days = np.arange(np.datetime64(start_date), np.datetime64(end_date) + 1)
+    return np.char.replace(days.astype(str), "-", "")
+
+
+def generate_data(
+    path,
+    customers=1000,
+    items_per_customer=10,
+    products=100,
+    categories=10,
+    start_date="2019-01-01",
+    end_date="2021-12-31",
+    seed=0,
+):
+    """Write a synthetic data.csv to ``path`` and return the number of line items.
+
+    Each customer gets between 1 and ``2 * items_per_customer - 1`` line items
+    (``items_per_customer`` on average), drawn from ``products`` products spread
+    over ``categories`` categories, with order dates uniform over
+    ``start_date`` .. ``end_date`` inclusive.
+    """
+    if customers < 0 or items_per_customer < 1 or products < 1 or not 1 <= categories <= products:
+        raise ValueError("need customers >= 0, items_per_customer >= 1 and 1 <= categories <= products")
+    start, end = date.fromisoformat(str(start_date)), date.fromisoformat(str(end_date))
+    if end < start:
+        raise ValueError(f"end_date {end} is before start_date {start}")
+
+    rng = np.random.default_rng(seed)
+    category_names = [f"Category{i:03d}" for i in range(categories)]
+    category_descriptions = [f"Description of category {i}" for i in range(categories)]
+    product_names = np.array([f"Product{i:05d}" for i in range(products)])
+    product_category = np.arange(products) % categories
+    product_prices = np.array([f"{p:.2f}" for p in rng.uniform(1, 100, products)])
+    product_category_names = np.array(category_names)[product_category]
+    product_category_descriptions = np.array(category_descriptions)[product_category]
+    days = _day_strings(start, end)
+
+    places = [(region, country) for region in sorted(REGIONS) for country in REGIONS[region]]
+    line_items = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("\t".join(HEADER) + "\n")
+        for block_start in range(0, customers, _BLOCK_SIZE):
+            n = min(_BLOCK_SIZE, customers - block_start)
+            counts = rng.integers(1, 2 * items_per_customer, size=n)
+            total = int(counts.sum())
+            product_idx = rng.integers(0, products, size=total)
+            quantities = rng.integers(1, 51, size=total).astype(str)
+            day_idx = rng.integers(0, len(days), size=total)
+            place_idx = rng.integers(0, len(places), size=n)
+            street_numbers = rng.integers(1, 1000, size=n)
+            bounds = np.r_[0, np.cumsum(counts)]
+
+            lines = []
+            for i in range(n):
+                customer = block_start + i
+                lo, hi = bounds[i], bounds[i + 1]
+                items = product_idx[lo:hi]
+                region, country = places[place_idx[i]]
+                fields = [
+                    f"{FIRST_NAMES[customer % len(FIRST_NAMES)]} Customer{customer:08d}",
+                    f"{street_numbers[i]} Main St",
+                    f"{country} City",
+                    country,
+                    region,
+                    ";".join(product_names[items]),
+                    ";".join(product_category_names[items]),
+                    ";".join(product_category_descriptions[items]),
+                    ";".join(product_prices[items]),
+                    ";".join(quantities[lo:hi]),
+                    ";".join(days[day_idx[lo:hi]]),
+                ]
+                lines.append("\t".join(f'"{value}"' for value in fields) + "\n")
+            f.writelines(lines)
+            line_items += total
+    return line_items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--items-per-customer", type=int, default=10)
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--categories", type=int, default=10)
+    parser.add_argument("--start-date", default="2019-01-01")
+    parser.add_argument("--end-date", default="2021-12-31")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    line_items = generate_data(
+        args.path, args.customers, args.items_per_customer, args.products, args.categories,
+        args.start_date, args.end_date, args.seed,
+    )
+    print(f"{args.path} created: {args.customers} customers, {line_items} line items")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""psycopg2-like connection over SQLite, standing in for Postgres in the assistant tests."""
+
+import sqlite3
+import threading
+
+import psycopg2
+import psycopg2.errors
+
+
+class StandInServer:
+    """Shared state of the stand-in: the database file and switches to break connections."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.lock = threading.Lock()
+        self.connects = 0
+        self.statements = []
+        self.down = False
+        # What EXPLAIN (FORMAT JSON) reports for every statement.
+        self.plan_cost = 10.0
+        self.plan_rows = 100
+
+    def connect(self):
+        with self.lock:
+            if self.down:
+                raise psycopg2.OperationalError("could not connect to server")
+            self.connects += 1
+        return StandInConnection(self)
+
+
+class _Rows:
+    """Canned result rows with the fetch API of a DB-API cursor."""
+
+    def __init__(self, rows, description):
+        self._rows = list(rows)
+        self.description = description
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchmany(self, size=1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        pass
+
+
+class StandInCursor:
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._db_cur = conn._db.cursor()
+        # Where fetches read from: the SQLite cursor, or canned rows after EXPLAIN.
+        self._cur = self._db_cur
+        self.description = None
+
+    def execute(self, sql, params=None):
+        conn = self._conn
+        if conn.closed or conn.server.down:
+            conn.closed = 2
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        if conn.aborted:
+            raise psycopg2.errors.InFailedSqlTransaction(
+                "current transaction is aborted, commands ignored until end of transaction block"
+            )
+        with conn.server.lock:
+            conn.server.statements.append(sql)
+        if sql.upper().startswith("SET "):
+            conn.settings.append(sql)
+            self.description = None
+            return
+        self._cur = self._db_cur
+        try:
+            if sql.upper().startswith("EXPLAIN (FORMAT JSON) "):
+                # Let SQLite compile the statement so errors surface, then report the canned plan.
+                self._db_cur.execute("EXPLAIN " + sql[len("EXPLAIN (FORMAT JSON) "):], params or ())
+                self._cur = _Rows([([{"Plan": {
+                    "Node Type": "Seq Scan",
+                    "Total Cost": conn.server.plan_cost,
+                    "Plan Rows": conn.server.plan_rows,
+                }}],)], [("QUERY PLAN",)])
+                self.description = self._cur.description
+                return
+            self._cur.execute(sql, params or ())
+        except sqlite3.Error as e:
+            conn.aborted = True
+            raise psycopg2.ProgrammingError(str(e)) from e
+        self.description = self._cur.description
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._cur.fetchmany(size)
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    def close(self):
+        self._db_cur.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class StandInConnection:
+    """Mimics the psycopg2 connection API: ``closed``, transactions that abort on error."""
+
+    def __init__(self, server):
+        self.server = server
+        self._db = sqlite3.connect(server.path, check_same_thread=False)
+        self.closed = 0
+        self.aborted = False
+        # SET statements of the current transaction.
+        self.settings = []
+
+    def cursor(self, name=None):
+        return StandInCursor(self)
+
+    def rollback(self):
+        if self.closed:
+            raise psycopg2.InterfaceError("connection already closed")
+        self._db.rollback()
+        self.aborted = False
+        self.settings = []
+
+    def commit(self):
+        self._db.commit()
+        self.settings = []
+
+    def close(self):
+        if not self.closed:
+            self._db.close()
+        self.closed = 1
@@ -0,0 +1,76 @@
+"""Small hand-written data.csv replica used by the engine tests."""
+
+import random
+
+HEADER = [
+    "Name", "Address", "City", "Country", "Region", "ProductName", "ProductCategory",
+    "ProductCategoryDescription", "ProductUnitPrice", "QuantityOrderded", "OrderDate",
+]
+
+ROWS = [
+    ["Maria Anders", "Obere Str. 57", "Berlin", "Germany", "Western Europe",
+     "Chai;Aniseed Syrup;Chai", "Beverages;Condiments;Beverages",
+     "Soft drinks, coffees, teas, beers, and ales;Sweet and savory sauces;Soft drinks, coffees, teas, beers, and ales",
+     "18.0;10.0;18.0", "3;7;2", "20190105;20190420;20191111"],
+    ["Ana Trujillo", "Avda. de la Constitucion 2222", "Mexico D.F.", "Mexico", "Central America",
+     "Ikura;Chai", "Seafood;Beverages",
+     "Seaweed and fish;Soft drinks, coffees, teas, beers, and ales",
+     "31.0;18.0", "5;1", "20190301;20200715"],
+    ["Thomas Hardy", "120 Hanover Sq.", "London", "UK", "British Isles",
+     "Aniseed Syrup;Ikura;Konbu;Chai", "Condiments;Seafood;Seafood;Beverages",
+     "Sweet and savory sauces;Seaweed and fish;Seaweed and fish;Soft drinks, coffees, teas, beers, and ales",
+     "10.0;31.0;6.0;18.0", "4;2;10;6", "20190812;20190930;20201201;20210102"],
+    ["Hanna Moos", "Forsterstr. 57", "Mannheim", "Germany", "Western Europe",
+     "Konbu", "Seafood", "Seaweed and fish", "6.0", "12", "20200214"],
+    ["Ana Maria Lopez", "Calle 5", "Caracas", "Venezuela", "South America",
+     "Chai;Konbu", "Beverages;Seafood",
+     "Soft drinks, coffees, teas, beers, and ales;Seaweed and fish",
+     "18.0;6.0", "2;9", "20201005;20201006"],
+]
+
+
+def write_sample_data(path, rows=ROWS):
+    """Write ``rows`` to ``path`` in the quoted, tab-separated data.csv layout."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\t".join(HEADER) + "\n")
+        for row in rows:
+            f.write("\t".join(f'"{value}"' for value in row) + "\n")
+    return path
+
+
+_REGIONS = {
+    "North America": ["USA", "Canada", "Mexico"],
+    "Western Europe": ["Germany", "France", "Belgium"],
+    "Scandinavia": ["Sweden", "Norway"],
+    "South America": ["Brazil", "Argentina", "Venezuela"],
+    "British Isles": ["UK", "Ireland"],
+}
+_CATEGORIES = [
+    ("Beverages", "Soft drinks"), ("Condiments", "Sauces"), ("Seafood", "Fish"),
+    ("Dairy", "Cheeses"), ("Produce", "Fruit"),
+]
+
+
+def random_rows(n_customers, seed=0, max_items=20):
+    """Deterministic pseudo-random rows in the data.csv layout, one per customer."""
+    rnd = random.Random(seed)
+    products = [
+        (f"Prod{i:02d}", _CATEGORIES[i % len(_CATEGORIES)], f"{rnd.uniform(2, 90):.2f}") for i in range(30)
+    ]
+    rows = []
+    for i in range(n_customers):
+        region = rnd.choice(sorted(_REGIONS))
+        country = rnd.choice(_REGIONS[region])
+        items = [rnd.choice(products) for _ in range(rnd.randint(1, max_items))]
+        rows.append([
+            f"First{i % 50} Last{i}", f"{rnd.randint(1, 999)} Main St", f"City{country[:3]}", country, region,
+            ";".join(name for name, _, _ in items),
+            ";".join(category for _, (category, _), _ in items),
+            ";".join(description for _, (_, description), _ in items),
+            ";".join(price for _, _, price in items),
+            ";".join(str(rnd.randint(1, 50)) for _ in items),
+            ";".join(
+                f"{rnd.randint(2019, 2021)}{rnd.randint(1, 12):02d}{rnd.randint(1, 28):02d}" for _ in items
+            ),
+        ])
+    return rows
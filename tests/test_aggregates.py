@@ -0,0 +1,96 @@
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(1, str(Path(__file__).parents[1]))
+sys.path.insert(1, str(Path(__file__).parent))
+
+
+import mini_project2
+from sample_data import ROWS, random_rows, write_sample_data
+
+
+AGGREGATE_REPORTS = ("ex3", "ex4")
+
+
+class TestMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        tmp = Path(self.tmpdir.name)
+        self.data_filename = write_sample_data(tmp / "data.csv")
+        self.initial_filename = write_sample_data(tmp / "initial.csv", ROWS[:2])
+        self.new_filename = write_sample_data(tmp / "new.csv", ROWS[2:])
+        self.normalized_database_filename = str(tmp / "normalized.db")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def assert_aggregates_match_fact_table(self):
+        conn = mini_project2.open_report_connection(self.normalized_database_filename)
+        try:
+            for name in AGGREGATE_REPORTS:
+                sql_statement = getattr(mini_project2, name)(conn, use_aggregates=True)
+                assert "OrderDetail" not in sql_statement, name
+                assert mini_project2.run_report(conn, name, use_aggregates=True) == \
+                    mini_project2.run_report(conn, name), name
+        finally:
+            conn.close()
+
+    def test_build_fills_aggregates(self):
+        mini_project2.build_normalized_database(self.data_filename, self.normalized_database_filename)
+        self.assert_aggregates_match_fact_table()
+
+    def test_trigger_keeps_aggregates_current_after_ingest(self):
+        mini_project2.build_normalized_database(self.initial_filename, self.normalized_database_filename)
+        mini_project2.ingest_new_orders(self.new_filename, self.normalized_database_filename)
+        self.assert_aggregates_match_fact_table()
+
+    def test_totals_stay_exact_across_ingests(self):
+        tmp = Path(self.tmpdir.name)
+        mini_project2.build_normalized_database(
+            write_sample_data(tmp / "random0.csv", random_rows(300, seed=0)), self.normalized_database_filename
+        )
+        self.assert_aggregates_match_fact_table()
+        for seed in (1, 2):
+            mini_project2.ingest_new_orders(
+                write_sample_data(tmp / f"random{seed}.csv", random_rows(300, seed=seed)),
+                self.normalized_database_filename,
+            )
+            self.assert_aggregates_match_fact_table()
+
+    def test_falls_back_with_float_aggregate_tables(self):
+        mini_project2.build_normalized_database(self.data_filename, self.normalized_database_filename)
+        conn = mini_project2.open_report_connection(self.normalized_database_filename)
+        try:
+            conn.execute("DROP TABLE CustomerTotal")
+            conn.execute("CREATE TABLE CustomerTotal (CustomerID integer PRIMARY KEY, Total real NOT NULL)")
+            conn.commit()
+            mini_project2._READY_DATABASES.clear()
+            assert "OrderDetail" in mini_project2.ex3(conn, use_aggregates=True)
+        finally:
+            conn.close()
+
+    def test_falls_back_without_aggregate_tables(self):
+        mini_project2.build_normalized_database(
+            self.data_filename, self.normalized_database_filename, create_aggregates=False
+        )
+        conn = mini_project2.open_report_connection(self.normalized_database_filename)
+        assert "OrderDetail" in mini_project2.ex3(conn, use_aggregates=True)
+        conn.close()
+
+    def test_fresh_process_uses_aggregates_for_first_report(self):
+        mini_project2.build_normalized_database(self.data_filename, self.normalized_database_filename)
+        mini_project2._READY_DATABASES.clear()
+        conn = mini_project2.open_report_connection(self.normalized_database_filename)
+        try:
+            for name in AGGREGATE_REPORTS:
+                mini_project2._READY_DATABASES.clear()
+                assert "OrderDetail" not in getattr(mini_project2, name)(conn, use_aggregates=True), name
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+
+import sqlite3
+sys.path.insert(1, str(Path(__file__).parents[1]))
+sys.path.insert(1, str(Path(__file__).parent))
+
+
+import mini_project2
+from sample_data import write_sample_data
+
+
+class TestMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.data_filename = write_sample_data(Path(self.tmpdir.name) / "data.csv")
+        self.normalized_database_filename = str(Path(self.tmpdir.name) / "normalized.db")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def fetch(self, sql):
+        conn = sqlite3.connect(self.normalized_database_filename)
+        rows = conn.execute(sql).fetchall()
+        conn.close()
+        return rows
+
+    def test_builds_all_tables_with_step_ids(self):
+        mini_project2.build_normalized_database(self.data_filename, self.normalized_database_filename)
+        assert self.fetch("SELECT * FROM Region") == [
+            (1, "British Isles"), (2, "Central America"), (3, "South America"), (4, "Western Europe"),
+        ]
+        assert self.fetch("SELECT * FROM Country") == [
+            (1, "Germany", 4), (2, "Mexico", 2), (3, "UK", 1), (4, "Venezuela", 3),
+        ]
+        assert self.fetch("SELECT CustomerID, FirstName, LastName, CountryID FROM Customer") == [
+            (1, "Ana", "Maria Lopez", 4), (2, "Ana", "Trujillo", 2), (3, "Hanna", "Moos", 1),
+            (4, "Maria", "Anders", 1), (5, "Thomas", "Hardy", 3),
+        ]
+        assert self.fetch("SELECT ProductID, ProductName, ProductUnitPrice, ProductCategoryID FROM Product") == [
+            (1, "Aniseed Syrup", 10.0, 2), (2, "Chai", 18.0, 1), (3, "Ikura", 31.0, 3), (4, "Konbu", 6.0, 3),
+        ]
+        assert self.fetch("SELECT * FROM OrderDetail WHERE OrderID <= 3") == [
+            (1, 1, 2, "2020-10-05", 2), (2, 1, 4, "2020-10-06", 9), (3, 2, 3, "2019-03-01", 5),
+        ]
+        assert self.fetch("SELECT count(*) FROM OrderDetail") == [(12,)]
+
+    def test_through_limits_tables(self):
+        mini_project2.step3_create_country_table(self.data_filename, self.normalized_database_filename)
+        tables = self.fetch("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name")
+        assert tables == [("Country",), ("Region",)]
+
+    def test_step11_matches_engine(self):
+        mini_project2.build_normalized_database(self.data_filename, self.normalized_database_filename)
+        expected = self.fetch("SELECT * FROM OrderDetail")
+        mini_project2.step11_create_orderdetail_table(self.data_filename, self.normalized_database_filename)
+        assert self.fetch("SELECT * FROM OrderDetail") == expected
+
+    def test_small_batches_match_single_batch(self):
+        mini_project2.build_normalized_database(self.data_filename, self.normalized_database_filename)
+        expected = self.fetch("SELECT * FROM OrderDetail")
+        mini_project2.build_normalized_database(
+            self.data_filename, self.normalized_database_filename, batch_size=2
+        )
+        assert self.fetch("SELECT * FROM OrderDetail") == expected
+
+    def test_parallel_build_matches_serial(self):
+        mini_project2.build_normalized_database(self.data_filename, self.normalized_database_filename)
+        expected = {table: self.fetch(f"SELECT * FROM {table}") for table in mini_project2._BUILD_ORDER}
+        mini_project2.build_normalized_database(
+            self.data_filename, self.normalized_database_filename, workers=3
+        )
+        for table, rows in expected.items():
+            assert self.fetch(f"SELECT * FROM {table}") == rows
+
+    def test_bulk_load_matches_default_and_restores_journal(self):
+        mini_project2.build_normalized_database(self.data_filename, self.normalized_database_filename)
+        expected = {table: self.fetch(f"SELECT * FROM {table}") for table in mini_project2._BUILD_ORDER}
+        mini_project2.build_normalized_database(
+            self.data_filename, self.normalized_database_filename, bulk_load=True
+        )
+        for table, rows in expected.items():
+            assert self.fetch(f"SELECT * FROM {table}") == rows
+        assert self.fetch("PRAGMA journal_mode") == [("delete",)]
+
+    def test_foreign_key_check_raises(self):
+        conn = sqlite3.connect(":memory:")
+        conn.execute(mini_project2._TABLE_SCHEMAS["Region"])
+        conn.execute(mini_project2._TABLE_SCHEMAS["Country"])
+        conn.execute("INSERT INTO Country VALUES (1, 'Atlantis', 42)")
+        with self.assertRaises(sqlite3.IntegrityError):
+            mini_project2._check_foreign_keys(conn)
+        conn.close()
+
+    def test_byte_ranges_are_line_aligned(self):
+        path = mini_project2._resolve_path(self.data_filename)
+        header, data_start = mini_project2._read_header(path)
+        ranges = mini_project2._split_byte_ranges(path, data_start, 50)
+        with open(path, "rb") as f:
+            raw = f.read()
+        assert ranges[0][0] == data_start and ranges[-1][1] == len(raw)
+        for (start, end), (next_start, _) in zip(ranges, ranges[1:]):
+            assert end == next_start and raw[start - 1:start] == b"\n"
+
+    def test_dimension_keeps_first_seen_attributes(self):
+        countries = mini_project2._Dimension()
+        countries.add("Mexico", "Central America")
+        countries.add("Germany", "Western Europe")
+        countries.add("Mexico", "North America")
+        assert countries.ids() == {"Germany": 1, "Mexico": 2}
+        assert countries.rows() == [(1, "Germany", "Western Europe"), (2, "Mexico", "Central America")]
+
+        customers = mini_project2._Dimension(sort_key=lambda name, attributes: attributes)
+        customers.add("Ann Devon", "Ann", "Devon")
+        customers.add("Anna Cruz", "Anna", "Cruz")
+        assert customers.ids() == {"Ann Devon": 1, "Anna Cruz": 2}
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import sys
+import tempfile
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+sys.path.insert(1, str(Path(__file__).parents[1]))
+sys.path.insert(1, str(Path(__file__).parent))
+
+
+import columnar_engine
+import mini_project2
+from sample_data import random_rows, write_sample_data
+
+# Columns each report is ORDER BY'd on; rows tying on them may come out in either order.
+SORT_COLUMNS = {
+    "ex3": [1], "ex4": [1], "ex5": [1], "ex6": [0, 3], "ex7": [0],
+    "ex8": [1, 0, 2], "ex9": [1, 0, 4], "ex10": [2], "ex11": [6, 0],
+}
+
+
+class TestMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        tmp = Path(self.tmpdir.name)
+        self.normalized_database_filename = str(tmp / "normalized.db")
+        self.data_filename = write_sample_data(tmp / "data.csv", random_rows(300, seed=7))
+        mini_project2.build_normalized_database(self.data_filename, self.normalized_database_filename)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def sql_rows(self, name):
+        conn = mini_project2.create_connection(self.normalized_database_filename)
+        rows = conn.execute(mini_project2._REPORTS[name](conn)).fetchall()
+        conn.close()
+        return rows
+
+    def assert_same_report(self, name, rows, expected):
+        key = lambda row: [row[i] for i in SORT_COLUMNS[name]]
+        assert [key(row) for row in rows] == [key(row) for row in expected], name
+        if name == "ex11":
+            # ROW_NUMBER picks any of a customer's equally long gaps; compare all but the dates.
+            rows = [row[:4] + row[6:] for row in rows]
+            expected = [row[:4] + row[6:] for row in expected]
+        assert sorted(rows) == sorted(expected), name
+
+    def test_reports_match_sql(self):
+        engine = columnar_engine.ColumnarEngine.from_database(self.normalized_database_filename)
+        for name in SORT_COLUMNS:
+            self.assert_same_report(name, engine.report(name), self.sql_rows(name))
+
+    def test_ex11_dates_bound_the_gap(self):
+        engine = columnar_engine.ColumnarEngine.from_database(self.normalized_database_filename)
+        for row in engine.ex11():
+            order_date, previous_date, gap = row[4], row[5], row[6]
+            assert np.datetime64(order_date) - np.datetime64(previous_date) == np.timedelta64(int(gap), "D")
+
+    def test_reports_match_sql_after_ingest(self):
+        new_filename = write_sample_data(Path(self.tmpdir.name) / "new.csv", random_rows(40, seed=8))
+        mini_project2.ingest_new_orders(new_filename, self.normalized_database_filename)
+        engine = columnar_engine.load_engine(self.normalized_database_filename)
+        for name in SORT_COLUMNS:
+            self.assert_same_report(name, engine.report(name), self.sql_rows(name))
+
+    def test_load_engine_reloads_after_change(self):
+        engine = columnar_engine.load_engine(self.normalized_database_filename)
+        assert columnar_engine.load_engine(self.normalized_database_filename) is engine
+        new_filename = write_sample_data(Path(self.tmpdir.name) / "new.csv", random_rows(5, seed=9))
+        mini_project2.ingest_new_orders(new_filename, self.normalized_database_filename)
+        assert columnar_engine.load_engine(self.normalized_database_filename) is not engine
+
+    def test_sql_round_is_half_away_from_zero(self):
+        values = np.array([0.5, 1.5, 2.5, -2.5, 1234.4999])
+        assert columnar_engine._sql_round(values, 0).tolist() == [1.0, 2.0, 3.0, -3.0, 1234.0]
+        # The doubles of these .xx5 values sit just below the midpoint; SQLite still rounds up.
+        values = np.array([577.795, 1.005, 2.675, -8.345, 0.125, 10.0])
+        assert columnar_engine._sql_round(values, 2).tolist() == [577.8, 1.01, 2.68, -8.35, 0.13, 10.0]
+
+    def test_sql_round_matches_sqlite(self):
+        values = np.random.default_rng(0).uniform(-1000, 100000, 20000).round(3)
+        conn = sqlite3.connect(":memory:")
+        for digits in (0, 1, 2):
+            expected = [conn.execute("SELECT ROUND(?, ?)", (v, digits)).fetchone()[0] for v in values.tolist()]
+            assert columnar_engine._sql_round(values, digits).tolist() == expected, digits
+        conn.close()
+
+    def test_rank_desc(self):
+        partition = np.array([1, 1, 1, 2, 2, 1])
+        values = np.array([5.0, 7.0, 5.0, 1.0, 3.0, 2.0])
+        assert columnar_engine._rank_desc(partition, values).tolist() == [2, 1, 2, 2, 1, 4]
+
+
+if __name__ == '__main__':
+    unittest.main()
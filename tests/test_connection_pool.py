@@ -0,0 +1,88 @@
+import unittest
+import sys
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+
+sys.path.insert(1, str(Path(__file__).parents[1]))
+sys.path.insert(1, str(Path(__file__).parent))
+
+
+import mini_project2
+from sample_data import write_sample_data
+
+
+class TestMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        tmp = Path(self.tmpdir.name)
+        self.data_filename = write_sample_data(tmp / "data.csv")
+        self.normalized_database_filename = str(tmp / "normalized.db")
+        mini_project2.build_normalized_database(self.data_filename, self.normalized_database_filename)
+        self.pool = mini_project2.ConnectionPool()
+
+    def tearDown(self):
+        self.pool.close_all()
+        self.tmpdir.cleanup()
+
+    def in_thread(self, func):
+        result = []
+        thread = threading.Thread(target=lambda: result.append(func()))
+        thread.start()
+        thread.join()
+        return result[0]
+
+    def test_reuses_connection_per_thread(self):
+        conn = self.pool.get(self.normalized_database_filename)
+        assert self.pool.get(self.normalized_database_filename) is conn
+        assert conn.execute("PRAGMA foreign_keys").fetchone() == (1,)
+        other = self.in_thread(lambda: self.pool.get(self.normalized_database_filename))
+        assert other is not conn
+
+    def test_finished_threads_are_closed(self):
+        other = self.in_thread(lambda: self.pool.get(self.normalized_database_filename))
+        self.pool.get(str(Path(self.tmpdir.name) / "other.db"))
+        with self.assertRaises(sqlite3.ProgrammingError):
+            other.execute("SELECT 1")
+
+    def test_reopens_after_rebuild(self):
+        conn = self.pool.get(self.normalized_database_filename)
+        mini_project2.build_normalized_database(self.data_filename, self.normalized_database_filename)
+        fresh = self.pool.get(self.normalized_database_filename)
+        assert fresh is not conn
+        assert fresh.execute("SELECT count(*) FROM OrderDetail").fetchone() == (12,)
+
+    def test_rolls_back_on_error(self):
+        with self.assertRaises(ValueError):
+            with self.pool.connection(self.normalized_database_filename) as conn:
+                conn.execute("DELETE FROM OrderDetail")
+                raise ValueError("boom")
+        with self.pool.connection(self.normalized_database_filename) as conn:
+            assert conn.execute("SELECT count(*) FROM OrderDetail").fetchone() == (12,)
+
+    def test_commits_on_success(self):
+        with self.pool.connection(self.normalized_database_filename) as conn:
+            conn.execute("DELETE FROM OrderDetail WHERE OrderID = 1")
+        check = sqlite3.connect(self.normalized_database_filename)
+        assert check.execute("SELECT count(*) FROM OrderDetail").fetchone() == (11,)
+        check.close()
+
+    def test_context_manager_closes_all(self):
+        with mini_project2.ConnectionPool() as pool:
+            conn = pool.get(self.normalized_database_filename)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+    def test_lookups_share_the_pooled_connection(self):
+        mini_project2._forget_database(self.normalized_database_filename)
+        with mini_project2.pooled_connection(self.normalized_database_filename) as conn:
+            pass
+        mini_project2.step2_create_region_to_regionid_dictionary(self.normalized_database_filename)
+        with mini_project2.pooled_connection(self.normalized_database_filename) as again:
+            assert again is conn
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+
+import sqlite3
+sys.path.insert(1, str(Path(__file__).parents[1]))
+sys.path.insert(1, str(Path(__file__).parent))
+
+
+import mini_project2
+from sample_data import ROWS, write_sample_data
+
+
+class TestMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        tmp = Path(self.tmpdir.name)
+        self.data_filename = write_sample_data(tmp / "data.csv")
+        self.normalized_database_filename = str(tmp / "normalized.db")
+        mini_project2.build_normalized_database(self.data_filename, self.normalized_database_filename)
+        self.conn = sqlite3.connect(self.normalized_database_filename)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmpdir.cleanup()
+
+    def test_date_rows(self):
+        rows = self.conn.execute("SELECT * FROM Date WHERE DateID IN (20190105, 20201201)").fetchall()
+        assert rows == [
+            (20190105, "2019-01-05", 2019, 1, "Q1", 1, "January", 737064),
+            (20201201, "2020-12-01", 2020, 4, "Q4", 12, "December", 737760),
+        ]
+
+    def test_every_order_date_has_a_date_row(self):
+        missing = self.conn.execute(
+            "SELECT count(*) FROM OrderDetail o LEFT JOIN Date d ON o.OrderDate = d.Date WHERE d.DateID IS NULL"
+        ).fetchone()
+        assert missing == (0,)
+        assert self.conn.execute("SELECT count(*) FROM Date").fetchone() == (12,)
+
+    def test_date_keys_match_string_parsing(self):
+        mismatches = self.conn.execute(
+            """
+            SELECT count(*) FROM Date
+            WHERE Year != CAST(strftime('%Y', Date) AS INTEGER)
+                OR MonthNum != CAST(strftime('%m', Date) AS INTEGER)
+                OR Quarter != (MonthNum + 2) / 3
+                OR DayNumber + 1721424.5 != JULIANDAY(Date)
+            """
+        ).fetchone()
+        assert mismatches == (0,)
+
+    def test_reports_do_not_parse_dates(self):
+        for name in ("ex8", "ex9", "ex10", "ex11"):
+            sql_statement = mini_project2._REPORTS[name](self.conn)
+            assert "strftime" not in sql_statement
+            assert "JULIANDAY" not in sql_statement
+
+    def test_ingest_adds_only_new_dates(self):
+        new_filename = write_sample_data(
+            Path(self.tmpdir.name) / "new.csv", [ROWS[0][:10] + ["20190105;20240229"]]
+        )
+        self.conn.close()
+        report = mini_project2.ingest_new_orders(new_filename, self.normalized_database_filename)
+        self.conn = sqlite3.connect(self.normalized_database_filename)
+        assert report["Date"] == 1
+        assert self.conn.execute("SELECT Quarter, MonthName FROM Date WHERE DateID = 20240229").fetchone() == (1, "February")
+
+    def legacy_database(self, data_filename, name):
+        """A database shaped like one built before the Date dimension: no Date, aggregates or trigger."""
+        path = str(Path(self.tmpdir.name) / name)
+        mini_project2.build_normalized_database(
+            data_filename, path, create_indexes=False, create_aggregates=False
+        )
+        conn = sqlite3.connect(path)
+        conn.execute("DROP TABLE Date")
+        conn.commit()
+        conn.close()
+        mini_project2._READY_DATABASES.clear()
+        return path
+
+    def test_reports_on_database_without_date_table(self):
+        legacy = self.legacy_database(self.data_filename, "legacy.db")
+        conn = sqlite3.connect(legacy)
+        try:
+            for name in ("ex8", "ex9", "ex10", "ex11"):
+                assert mini_project2.run_report(conn, name) == mini_project2.run_report(self.conn, name), name
+            assert conn.execute("SELECT count(*) FROM Date").fetchone() == \
+                self.conn.execute("SELECT count(*) FROM Date").fetchone()
+        finally:
+            conn.close()
+
+    def test_ingest_into_database_without_date_table(self):
+        tmp = Path(self.tmpdir.name)
+        initial = write_sample_data(tmp / "initial.csv", ROWS[:2])
+        new = write_sample_data(tmp / "new.csv", ROWS[2:])
+        current = str(tmp / "current.db")
+        mini_project2.build_normalized_database(initial, current)
+        mini_project2.ingest_new_orders(new, current)
+        legacy = self.legacy_database(initial, "legacy.db")
+        mini_project2.ingest_new_orders(new, legacy)
+        conn, expected = sqlite3.connect(legacy), sqlite3.connect(current)
+        try:
+            for name in ("ex8", "ex9", "ex10", "ex11"):
+                assert mini_project2.run_report(conn, name) == mini_project2.run_report(expected, name), name
+        finally:
+            conn.close()
+            expected.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
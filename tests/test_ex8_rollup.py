@@ -0,0 +1,63 @@
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import sqlite3
+sys.path.insert(1, str(Path(__file__).parents[1]))
+sys.path.insert(1, str(Path(__file__).parent))
+
+
+import mini_project2
+from sample_data import ROWS, write_sample_data
+
+
+class TestMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        tmp = Path(self.tmpdir.name)
+        self.data_filename = write_sample_data(tmp / "data.csv", ROWS[:3])
+        self.new_filename = write_sample_data(tmp / "new.csv", ROWS[3:])
+        self.normalized_database_filename = str(tmp / "normalized.db")
+        mini_project2.build_normalized_database(self.data_filename, self.normalized_database_filename)
+        self.conn = mini_project2.open_report_connection(self.normalized_database_filename)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmpdir.cleanup()
+
+    def test_rollup_from_orderdetail(self):
+        rows = self.conn.execute(mini_project2.ex8(self.conn)).fetchall()
+        assert rows == [
+            ("Q1", 2019, 1, 155.0),
+            ("Q1", 2019, 2, 54.0),
+            ("Q2", 2019, 2, 70.0),
+            ("Q3", 2019, 3, 102.0),
+            ("Q4", 2019, 2, 36.0),
+            ("Q3", 2020, 1, 18.0),
+            ("Q4", 2020, 3, 60.0),
+            ("Q1", 2021, 3, 108.0),
+        ]
+
+    def test_result_cached_until_database_changes(self):
+        first = mini_project2.run_report(self.conn, "ex8")
+        ex8 = mock.Mock()
+        with mock.patch.dict(mini_project2._REPORTS, {"ex8": ex8}):
+            assert mini_project2.run_report(self.conn, "ex8") == first
+        ex8.assert_not_called()
+
+        mini_project2.ingest_new_orders(self.new_filename, self.normalized_database_filename)
+        after = mini_project2.run_report(self.conn, "ex8")
+        assert after != first
+        assert after == self.conn.execute(mini_project2.ex8(self.conn)).fetchall()
+
+    def test_in_memory_connections_are_not_cached(self):
+        conn = sqlite3.connect(":memory:")
+        assert mini_project2._report_cache_key(conn, "ex8", (), {}) == (None, None)
+        conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
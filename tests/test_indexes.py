@@ -0,0 +1,57 @@
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+
+import sqlite3
+sys.path.insert(1, str(Path(__file__).parents[1]))
+sys.path.insert(1, str(Path(__file__).parent))
+
+
+import mini_project2
+from sample_data import write_sample_data
+
+
+class TestMethods(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        data_filename = write_sample_data(Path(cls.tmpdir.name) / "data.csv")
+        cls.normalized_database_filename = str(Path(cls.tmpdir.name) / "normalized.db")
+        mini_project2.build_normalized_database(data_filename, cls.normalized_database_filename)
+        cls.conn = sqlite3.connect(cls.normalized_database_filename)
+
+    def plan(self, sql_statement):
+        rows = self.conn.execute("EXPLAIN QUERY PLAN " + sql_statement).fetchall()
+        return "\n".join(row[3] for row in rows)
+
+    def test_statistics_gathered(self):
+        tables = {row[0] for row in self.conn.execute("SELECT tbl FROM sqlite_stat1")}
+        assert {"OrderDetail", "Customer", "Country"} <= tables
+
+    def test_ex1_uses_covering_customer_index(self):
+        plan = self.plan(mini_project2.ex1(self.conn, "Thomas Hardy"))
+        assert "COVERING INDEX idx_OrderDetail_CustomerID (CustomerID=?)" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_ex2_uses_covering_customer_index(self):
+        plan = self.plan(mini_project2.ex2(self.conn, "Thomas Hardy"))
+        assert "COVERING INDEX idx_OrderDetail_CustomerID (CustomerID=?)" in plan
+
+    def test_ex4_uses_dimension_indexes(self):
+        plan = self.plan(mini_project2.ex4(self.conn))
+        assert "idx_Country_RegionID" in plan
+        assert "idx_Customer_CountryID" in plan
+        assert "SCAN o" not in plan
+
+    def test_full_table_reads_keep_rowid_order(self):
+        assert self.plan("SELECT * FROM OrderDetail LIMIT 1000") == "SCAN OrderDetail"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+        cls.tmpdir.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+
+import sqlite3
+sys.path.insert(1, str(Path(__file__).parents[1]))
+sys.path.insert(1, str(Path(__file__).parent))
+
+
+import mini_project2
+from sample_data import ROWS, write_sample_data
+
+
+class TestMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        tmp = Path(self.tmpdir.name)
+        self.initial_filename = write_sample_data(tmp / "initial.csv", ROWS[:3])
+        repeat_order = ROWS[0][:5] + ["Konbu", "Seafood", "Seaweed and fish", "6.0", "1", "20210301"]
+        self.new_filename = write_sample_data(tmp / "new.csv", ROWS[3:] + [repeat_order])
+        self.normalized_database_filename = str(tmp / "normalized.db")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def fetch(self, sql):
+        conn = sqlite3.connect(self.normalized_database_filename)
+        rows = conn.execute(sql).fetchall()
+        conn.close()
+        return rows
+
+    def test_appends_new_keys_and_orders(self):
+        mini_project2.build_normalized_database(self.initial_filename, self.normalized_database_filename)
+        report = mini_project2.ingest_new_orders(self.new_filename, self.normalized_database_filename)
+        assert report == {
+            "Region": 1, "Country": 1, "Customer": 2, "ProductCategory": 0, "Product": 0, "Date": 4,
+            "OrderDetail": 4,
+        }
+        assert self.fetch("SELECT * FROM Region") == [
+            (1, "British Isles"), (2, "Central America"), (3, "Western Europe"), (4, "South America"),
+        ]
+        assert self.fetch("SELECT CustomerID, FirstName, LastName FROM Customer WHERE CustomerID > 3") == [
+            (4, "Ana", "Maria Lopez"), (5, "Hanna", "Moos"),
+        ]
+        assert self.fetch("SELECT * FROM OrderDetail WHERE OrderID > 9") == [
+            (10, 2, 4, "2021-03-01", 1),
+            (11, 4, 2, "2020-10-05", 2),
+            (12, 4, 4, "2020-10-06", 9),
+            (13, 5, 4, "2020-02-14", 12),
+        ]
+
+    def test_builds_when_database_is_missing(self):
+        report = mini_project2.ingest_new_orders(self.initial_filename, self.normalized_database_filename)
+        assert report["Customer"] == 3
+        assert report["OrderDetail"] == 9
+
+
+if __name__ == '__main__':
+    unittest.main()
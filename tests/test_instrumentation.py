@@ -0,0 +1,92 @@
+import unittest
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+sys.path.insert(1, str(Path(__file__).parents[1]))
+sys.path.insert(1, str(Path(__file__).parent))
+
+
+import mini_project2
+from instrumentation import Metrics, normalize_sql
+from sample_data import ROWS, write_sample_data
+
+
+class TestMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        tmp = Path(self.tmpdir.name)
+        self.data_filename = write_sample_data(tmp / "data.csv")
+        self.normalized_database_filename = str(tmp / "normalized.db")
+
+    def tearDown(self):
+        mini_project2.set_default_metrics(None)
+        self.tmpdir.cleanup()
+
+    def test_build_stages(self):
+        events = []
+        metrics = Metrics(callback=events.append)
+        mini_project2.build_normalized_database(self.data_filename, self.normalized_database_filename, metrics=metrics)
+
+        stages = {stage["name"]: stage for stage in metrics.to_dict()["stages"]}
+        assert list(stages) == ["scan"] + [f"load:{t}" for t in mini_project2._BUILD_ORDER] + [
+            "aggregates", "indexes", "commit",
+        ]
+        assert [event["name"] for event in events] == list(stages)
+        assert stages["scan"]["rows_parsed"] == len(ROWS)
+        assert stages["load:Customer"]["rows_inserted"] == 5
+        assert stages["load:OrderDetail"]["rows_parsed"] == stages["load:OrderDetail"]["rows_inserted"] == 12
+        assert stages["load:OrderDetail"]["rows_per_second"] > 0
+
+        inserts = {s["sql"]: s for s in stages["load:OrderDetail"]["statements"]}
+        insert = inserts["INSERT INTO OrderDetail (OrderID, CustomerID, ProductID, OrderDate, QuantityOrdered) VALUES (?, ?, ?, ?, ?)"]
+        assert insert["count"] == 12
+        assert insert["seconds"] >= 0
+
+    def test_json_export(self):
+        metrics = Metrics()
+        mini_project2.build_normalized_database(self.data_filename, self.normalized_database_filename, metrics=metrics)
+        path = Path(self.tmpdir.name) / "metrics.json"
+        text = metrics.to_json(path)
+        assert json.loads(path.read_text()) == json.loads(text) == metrics.to_dict()
+
+    def test_trace_sql_off(self):
+        metrics = Metrics(trace_sql=False)
+        mini_project2.build_normalized_database(self.data_filename, self.normalized_database_filename, metrics=metrics)
+        assert all(not stage.statements for stage in metrics.stages)
+
+    def test_default_metrics_cover_steps_and_reports(self):
+        metrics = Metrics()
+        mini_project2.set_default_metrics(metrics)
+        mini_project2.step3_create_country_table(self.data_filename, self.normalized_database_filename)
+        assert [stage.name for stage in metrics.stages] == [
+            "scan", "load:Region", "load:Country", "indexes", "commit",
+        ]
+
+        mini_project2.build_normalized_database(self.data_filename, self.normalized_database_filename)
+        conn = mini_project2.open_report_connection(self.normalized_database_filename)
+        rows = mini_project2.run_report(conn, "ex4")
+        conn.close()
+        report = metrics.stages[-1]
+        assert report.name == "report:ex4"
+        assert report.rows_returned == len(rows) == 4
+        assert any(sql.startswith("SELECT r.Region") for sql in report.statements)
+
+    def test_ingest_stages(self):
+        mini_project2.build_normalized_database(self.data_filename, self.normalized_database_filename)
+        metrics = Metrics()
+        mini_project2.ingest_new_orders(self.data_filename, self.normalized_database_filename, metrics=metrics)
+        stages = {stage.name: stage for stage in metrics.stages}
+        assert stages["load:OrderDetail"].rows_inserted == 12
+        assert stages["load:Customer"].rows_inserted == 0
+
+    def test_normalize_sql(self):
+        assert normalize_sql("SELECT *\n  FROM t WHERE a = 12 AND b = 'it''s' AND c1 = 1.5") == (
+            "SELECT * FROM t WHERE a = ? AND b = ? AND c1 = ?"
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import sqlite3
+sys.path.insert(1, str(Path(__file__).parents[1]))
+sys.path.insert(1, str(Path(__file__).parent))
+
+
+import mini_project2
+from sample_data import ROWS, write_sample_data
+
+
+class TestMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        tmp = Path(self.tmpdir.name)
+        self.data_filename = write_sample_data(tmp / "data.csv", ROWS[:3])
+        self.new_filename = write_sample_data(tmp / "new.csv", ROWS[3:])
+        self.normalized_database_filename = str(tmp / "normalized.db")
+        mini_project2.build_normalized_database(self.data_filename, self.normalized_database_filename)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_second_call_does_not_connect(self):
+        first = mini_project2.step6_create_customer_to_customerid_dictionary(self.normalized_database_filename)
+        with mock.patch.object(mini_project2, "create_connection") as create_connection:
+            second = mini_project2.step6_create_customer_to_customerid_dictionary(self.normalized_database_filename)
+        create_connection.assert_not_called()
+        assert first == second == {"Ana Trujillo": 1, "Maria Anders": 2, "Thomas Hardy": 3}
+
+    def test_returned_dict_is_a_copy(self):
+        result = mini_project2.step2_create_region_to_regionid_dictionary(self.normalized_database_filename)
+        result["Atlantis"] = 99
+        assert "Atlantis" not in mini_project2.step2_create_region_to_regionid_dictionary(
+            self.normalized_database_filename)
+
+    def test_invalidated_by_ingest(self):
+        before = mini_project2.step6_create_customer_to_customerid_dictionary(self.normalized_database_filename)
+        mini_project2.ingest_new_orders(self.new_filename, self.normalized_database_filename)
+        after = mini_project2.step6_create_customer_to_customerid_dictionary(self.normalized_database_filename)
+        assert len(before) == 3 and len(after) == 5
+
+    def test_invalidated_by_other_writer(self):
+        mini_project2.step4_create_country_to_countryid_dictionary(self.normalized_database_filename)
+        conn = sqlite3.connect(self.normalized_database_filename)
+        conn.execute("INSERT INTO Country VALUES (99, 'Atlantis', 1)")
+        conn.commit()
+        conn.close()
+        assert mini_project2.step4_create_country_to_countryid_dictionary(
+            self.normalized_database_filename)["Atlantis"] == 99
+
+    def test_cache_is_bounded(self):
+        with mock.patch.object(mini_project2, "_LOOKUP_CACHE_MAXSIZE", 2):
+            for step in (mini_project2.step2_create_region_to_regionid_dictionary,
+                         mini_project2.step4_create_country_to_countryid_dictionary,
+                         mini_project2.step10_create_product_to_productid_dictionary):
+                step(self.normalized_database_filename)
+            assert len(mini_project2._LOOKUP_CACHE) == 2
+            cached_tables = [key[1] for key in mini_project2._LOOKUP_CACHE]
+        assert cached_tables == ["Country", "Product"]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import sys
+import gzip
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+sys.path.insert(1, str(Path(__file__).parents[1]))
+sys.path.insert(1, str(Path(__file__).parent))
+
+
+import make_flat_csv
+from sample_data import ROWS, write_sample_data
+
+
+class TestMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.data_filename = write_sample_data(Path(self.tmpdir.name) / "data.csv")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_matches_rowwise_flattener(self):
+        expected = make_flat_csv._make_orders_dataframe_rowwise(self.data_filename)
+        df = make_flat_csv.make_orders_dataframe(self.data_filename)
+        pd.testing.assert_frame_equal(df, expected)
+        assert df.to_csv(index=False) == expected.to_csv(index=False)
+
+    def test_line_items(self):
+        df = make_flat_csv.make_orders_dataframe(self.data_filename)
+        assert list(df.columns) == make_flat_csv.FLAT_COLUMNS
+        assert len(df) == 12
+        assert df.iloc[0].tolist() == [
+            "Maria Anders", "Obere Str. 57", "Berlin", "Germany", "Western Europe",
+            "Chai", "Beverages", "Soft drinks, coffees, teas, beers, and ales", 18.0, 3, "2019-01-05",
+        ]
+
+    def test_single_item_orders(self):
+        # pandas reads these columns as numbers when no row has a ";"; the flattener must not care.
+        write_sample_data(self.data_filename, [ROWS[3]])
+        df = make_flat_csv.make_orders_dataframe(self.data_filename)
+        assert df[["product_name", "product_unit_price", "quantity_ordered", "order_date"]].values.tolist() == [
+            ["Konbu", 6.0, 12, "2020-02-14"],
+        ]
+
+    def test_chunked_csv_export_matches_full_frame(self):
+        out_path = str(Path(self.tmpdir.name) / "orders_flat.csv")
+        written = make_flat_csv.export_orders(self.data_filename, out_path, chunksize=2)
+        assert written == 12
+        expected = make_flat_csv.make_orders_dataframe(self.data_filename).to_csv(index=False)
+        with open(out_path, newline="") as f:
+            assert f.read() == expected
+
+    def test_gzip_csv_export(self):
+        out_path = str(Path(self.tmpdir.name) / "orders_flat.csv.gz")
+        make_flat_csv.export_orders(self.data_filename, out_path, chunksize=3)
+        expected = make_flat_csv.make_orders_dataframe(self.data_filename).to_csv(index=False)
+        with gzip.open(out_path, "rt", newline="") as f:
+            assert f.read() == expected
+
+    def test_parquet_export(self):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            self.skipTest("pyarrow is not installed")
+        out_path = str(Path(self.tmpdir.name) / "orders_flat.parquet")
+        written = make_flat_csv.export_orders(self.data_filename, out_path, chunksize=2)
+        assert written == 12
+        pd.testing.assert_frame_equal(
+            pd.read_parquet(out_path), make_flat_csv.make_orders_dataframe(self.data_filename)
+        )
+
+    def test_empty_input(self):
+        write_sample_data(self.data_filename, [])
+        out_path = str(Path(self.tmpdir.name) / "orders_flat.csv")
+        assert make_flat_csv.export_orders(self.data_filename, out_path) == 0
+        with open(out_path) as f:
+            assert f.read() == ",".join(make_flat_csv.FLAT_COLUMNS) + "\n"
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            make_flat_csv.export_orders(self.data_filename, "out.txt", fmt="xlsx")
+
+
+if __name__ == '__main__':
+    unittest.main()
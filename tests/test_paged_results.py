@@ -0,0 +1,133 @@
+import unittest
+import sys
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import psycopg2
+sys.path.insert(1, str(Path(__file__).parents[1]))
+sys.path.insert(1, str(Path(__file__).parent))
+
+
+from pg_standin import StandInServer
+from sql_assistant import CursorReaper, PoolTimeout, PostgresPool, ResultCache, open_query
+
+VERSION_SQL = "SELECT count(*) FROM orders"
+
+
+class TestMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        path = Path(self.tmpdir.name) / "orders.db"
+        db = sqlite3.connect(path)
+        db.execute("CREATE TABLE orders (n integer, total real)")
+        db.executemany("INSERT INTO orders VALUES (?, ?)", [(i, i * 1.5) for i in range(25)])
+        db.commit()
+        db.close()
+        self.server = StandInServer(path)
+        self.pool = PostgresPool(self.server.connect, maxconn=1, timeout=0.1)
+
+    def tearDown(self):
+        self.pool.close()
+        self.tmpdir.cleanup()
+
+    def test_first_page_then_more_on_demand(self):
+        result = open_query(self.pool, "SELECT n, total FROM orders ORDER BY n", page_size=10)
+        assert result.frame["n"].tolist() == list(range(10))
+        assert list(result.frame.columns) == ["n", "total"]
+        assert not result.complete
+        # The cursor keeps its connection checked out between pages.
+        with self.assertRaises(PoolTimeout):
+            with self.pool.connection():
+                pass
+        assert result.fetch_more() == 10
+        assert result.fetch_more() == 5
+        assert result.complete and not result.truncated
+        assert result.frame["n"].tolist() == list(range(25))
+        assert result.fetch_more() == 0
+        with self.pool.connection():
+            pass
+
+    def test_row_cap(self):
+        result = open_query(self.pool, "SELECT n FROM orders ORDER BY n", page_size=10, max_rows=15)
+        result.fetch_more()
+        assert len(result.frame) == 15
+        assert result.complete and result.truncated
+        exact = open_query(self.pool, "SELECT n FROM orders", page_size=10, max_rows=25)
+        exact.fetch_more()
+        exact.fetch_more()
+        assert len(exact.frame) == 25
+        assert exact.complete and not exact.truncated
+
+    def test_close_releases_connection(self):
+        result = open_query(self.pool, "SELECT n FROM orders", page_size=5)
+        result.close()
+        assert result.complete and len(result.frame) == 5
+        with self.pool.connection():
+            pass
+
+    def test_empty_result_keeps_columns(self):
+        result = open_query(self.pool, "SELECT n, total FROM orders WHERE n < 0")
+        assert result.complete
+        assert list(result.frame.columns) == ["n", "total"] and result.frame.empty
+
+    def test_failed_query_returns_connection(self):
+        with self.assertRaises(psycopg2.ProgrammingError):
+            open_query(self.pool, "SELECT missing FROM orders")
+        result = open_query(self.pool, "SELECT count(*) AS c FROM orders")
+        assert result.frame["c"].tolist() == [25]
+
+    def test_only_complete_results_are_cached(self):
+        cache = ResultCache(version_sql=VERSION_SQL, version_ttl=60)
+        sql = "SELECT n FROM orders ORDER BY n"
+        truncated = open_query(self.pool, sql, cache=cache, page_size=10, max_rows=10)
+        assert truncated.truncated
+        result = open_query(self.pool, sql, cache=cache, page_size=10)
+        assert not result.from_cache
+        result.fetch_more()
+        result.fetch_more()
+        again = open_query(self.pool, sql, cache=cache, page_size=10)
+        assert again.from_cache and again.complete
+        assert again.frame["n"].tolist() == list(range(25))
+
+    def test_idle_results_are_closed(self):
+        clock = [0.0]
+        reaper = CursorReaper(idle_timeout=60, interval=None, clock=lambda: clock[0])
+        result = open_query(self.pool, "SELECT n FROM orders ORDER BY n", page_size=10, reaper=reaper)
+        assert "SET LOCAL idle_in_transaction_session_timeout = 120000" in self.server.statements
+        clock[0] = 50.0
+        result.fetch_more()
+        clock[0] = 100.0
+        assert reaper.reap() == 0
+        clock[0] = 111.0
+        assert reaper.reap() == 1
+        assert result.complete and result.expired and len(result.frame) == 20
+        assert result.fetch_more() == 0
+        # Its connection is back in the pool.
+        with self.pool.connection():
+            pass
+
+    def test_new_query_reaps_idle_results_first(self):
+        clock = [0.0]
+        reaper = CursorReaper(idle_timeout=60, interval=None, clock=lambda: clock[0])
+        abandoned = open_query(self.pool, "SELECT n FROM orders", page_size=10, reaper=reaper)
+        clock[0] = 61.0
+        # The pool has one connection; the abandoned result must give it up.
+        result = open_query(self.pool, "SELECT count(*) AS c FROM orders", reaper=reaper)
+        assert abandoned.expired
+        assert result.frame["c"].tolist() == [25] and not result.expired
+
+    def test_reaper_thread_sweeps_in_the_background(self):
+        reaper = CursorReaper(idle_timeout=0.05, interval=0.01)
+        result = open_query(self.pool, "SELECT n FROM orders", page_size=10, reaper=reaper)
+        deadline = time.monotonic() + 5
+        while not result.expired and time.monotonic() < deadline:
+            time.sleep(0.01)
+        reaper.stop()
+        assert result.expired
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+import sys
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+
+import pandas as pd
+import psycopg2
+sys.path.insert(1, str(Path(__file__).parents[1]))
+sys.path.insert(1, str(Path(__file__).parent))
+
+
+from pg_standin import StandInServer
+from sql_assistant import PoolTimeout, PostgresPool
+
+
+class TestMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        path = Path(self.tmpdir.name) / "orders.db"
+        db = sqlite3.connect(path)
+        db.execute("CREATE TABLE orders (region text, total real)")
+        db.executemany("INSERT INTO orders VALUES (?, ?)", [("North", 10.0), ("South", 5.0)])
+        db.commit()
+        db.close()
+        self.server = StandInServer(path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_reuses_connections(self):
+        pool = PostgresPool(self.server.connect, minconn=1, maxconn=2)
+        for _ in range(3):
+            with pool.connection() as conn:
+                df = pd.read_sql("SELECT region FROM orders ORDER BY region", conn)
+        assert df["region"].tolist() == ["North", "South"]
+        assert self.server.connects == 1
+        pool.close()
+
+    def test_failed_query_does_not_poison_the_next_request(self):
+        pool = PostgresPool(self.server.connect, maxconn=1)
+        with self.assertRaises(psycopg2.ProgrammingError):
+            with pool.connection() as conn:
+                conn.cursor().execute("SELECT missing FROM orders")
+        with pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT count(*) FROM orders")
+            assert cur.fetchone() == (2,)
+        assert self.server.connects == 1
+
+    def test_reconnects_after_server_restart(self):
+        pool = PostgresPool(self.server.connect, maxconn=1, health_check_interval=0)
+        with pool.connection():
+            pass
+        self.server.down = True
+        with self.assertRaises(psycopg2.OperationalError):
+            with pool.connection():
+                pass
+        self.server.down = False
+        with pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+        assert self.server.connects == 2
+
+    def test_broken_connection_is_replaced(self):
+        pool = PostgresPool(self.server.connect, maxconn=1)
+        with self.assertRaises(psycopg2.OperationalError):
+            with pool.connection() as conn:
+                self.server.down = True
+                conn.cursor().execute("SELECT 1")
+        self.server.down = False
+        with pool.connection() as fresh:
+            assert fresh is not conn
+            assert not fresh.closed
+
+    def test_checkout_waits_for_a_free_connection(self):
+        pool = PostgresPool(self.server.connect, maxconn=1, timeout=0.05)
+        with pool.connection():
+            with self.assertRaises(PoolTimeout):
+                with pool.connection():
+                    pass
+
+    def test_concurrent_requests_get_their_own_connections(self):
+        pool = PostgresPool(self.server.connect, maxconn=4)
+        inside = threading.Barrier(4, timeout=5)
+        seen = []
+
+        def request():
+            with pool.connection() as conn:
+                seen.append(conn)
+                inside.wait()
+
+        threads = [threading.Thread(target=request) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len({id(conn) for conn in seen}) == 4
+        assert self.server.connects == 4
+
+
+if __name__ == '__main__':
+    unittest.main()
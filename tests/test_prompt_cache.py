@@ -0,0 +1,112 @@
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(1, str(Path(__file__).parents[1]))
+
+
+import sql_assistant
+from sql_assistant import PromptCache
+
+
+class StubResponse:
+
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    """Answers every prompt with a fenced query and counts the calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def generate_content(self, text):
+        self.calls.append(text)
+        return StubResponse(f"```sql\nSELECT COUNT(id) FROM orders -- {len(self.calls)};\n```")
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name) / "prompt_cache.sqlite"
+        self.model = StubModel()
+        self.clock = Clock()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def make_cache(self, version="v1", **options):
+        return PromptCache(self.path, version=version, clock=self.clock, **options)
+
+    def ask(self, cache, prompt):
+        return sql_assistant.nl_to_sql(self.model, "SYSTEM", prompt, cache=cache)
+
+    def test_cleans_and_caches_sql(self):
+        cache = self.make_cache()
+        sql = self.ask(cache, "Show sales by region?")
+        assert sql == "SELECT COUNT(*) FROM orders -- 1"
+        assert self.ask(cache, "  show SALES by   region ") == sql
+        assert len(self.model.calls) == 1
+
+    def test_disk_tier_survives_restart(self):
+        cache = self.make_cache()
+        sql = self.ask(cache, "sales by region")
+        cache.close()
+        reopened = self.make_cache()
+        assert self.ask(reopened, "sales by region") == sql
+        assert len(self.model.calls) == 1
+        reopened.close()
+
+    def test_new_version_starts_empty(self):
+        cache = self.make_cache()
+        self.ask(cache, "sales by region")
+        cache.close()
+        cache = self.make_cache(version="v2")
+        self.ask(cache, "sales by region")
+        assert len(self.model.calls) == 2
+        cache.close()
+
+    def test_ttl(self):
+        cache = self.make_cache(ttl=60)
+        self.ask(cache, "sales by region")
+        self.clock.now += 61
+        self.ask(cache, "sales by region")
+        assert len(self.model.calls) == 2
+        cache.close()
+
+    def test_memory_and_disk_eviction(self):
+        cache = self.make_cache(maxsize=1, max_disk_entries=2)
+        for prompt in ("a", "b", "c"):
+            self.ask(cache, prompt)
+            self.clock.now += 1
+        assert list(cache._memory) == ["c"]
+        assert self.ask(cache, "b").endswith("-- 2")
+        assert self.ask(cache, "a").endswith("-- 4")
+        assert len(self.model.calls) == 4
+        cache.close()
+
+    def test_memory_only(self):
+        cache = PromptCache(version="v1")
+        self.ask(cache, "sales")
+        self.ask(cache, "sales")
+        assert len(self.model.calls) == 1
+
+    def test_prompt_version(self):
+        assert sql_assistant.prompt_version("a", "m1") != sql_assistant.prompt_version("b", "m1")
+        assert sql_assistant.prompt_version("a", "m1") != sql_assistant.prompt_version("a", "m2")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import sqlite3
+sys.path.insert(1, str(Path(__file__).parents[1]))
+sys.path.insert(1, str(Path(__file__).parent))
+
+
+import mini_project2
+from sample_data import write_sample_data
+
+
+class TestMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.data_filename = write_sample_data(Path(self.tmpdir.name) / "data.csv")
+        self.normalized_database_filename = str(Path(self.tmpdir.name) / "normalized.db")
+        mini_project2.build_normalized_database(self.data_filename, self.normalized_database_filename)
+        self.conn = sqlite3.connect(self.normalized_database_filename)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmpdir.cleanup()
+
+    def test_built_database_needs_no_queries(self):
+        mini_project2.step6_create_customer_to_customerid_dictionary(self.normalized_database_filename)
+        with mock.patch.object(mini_project2, "create_connection") as create_connection, \
+                mock.patch.object(mini_project2, "_table_exists") as table_exists:
+            mini_project2.ex1(self.conn, "Thomas Hardy")
+            mini_project2.ex5(self.conn)
+            mini_project2.ex11(self.conn)
+        create_connection.assert_not_called()
+        table_exists.assert_not_called()
+
+    def test_unknown_database_is_checked_once_on_callers_connection(self):
+        mini_project2._READY_DATABASES.clear()
+        with mock.patch.object(mini_project2, "create_connection") as create_connection:
+            mini_project2.ex6(self.conn)
+        create_connection.assert_not_called()
+        with mock.patch.object(mini_project2, "_table_exists") as table_exists:
+            mini_project2.ex6(self.conn)
+        table_exists.assert_not_called()
+
+    def test_rewritten_database_is_no_longer_ready(self):
+        assert mini_project2._is_ready(self.normalized_database_filename)
+        self.conn.execute("INSERT INTO Region VALUES (99, 'Atlantis')")
+        self.conn.commit()
+        assert not mini_project2._is_ready(self.normalized_database_filename)
+
+    def test_unbuilt_database_raises_instead_of_rebuilding(self):
+        partial = str(Path(self.tmpdir.name) / "partial.db")
+        mini_project2.build_normalized_database(self.data_filename, partial, through="Customer")
+        conn = sqlite3.connect(partial)
+        try:
+            with self.assertRaisesRegex(sqlite3.OperationalError, "no OrderDetail table"):
+                mini_project2.ex5(conn)
+            # The caller's database is left as it was.
+            assert conn.execute("SELECT count(*) FROM Customer").fetchone()[0] > 0
+            assert not mini_project2._table_exists(conn, "OrderDetail")
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(1, str(Path(__file__).parents[1]))
+sys.path.insert(1, str(Path(__file__).parent))
+
+
+import mini_project2
+from sample_data import write_sample_data
+
+
+class TestMethods(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        data_filename = write_sample_data(Path(cls.tmpdir.name) / "data.csv")
+        normalized_database_filename = str(Path(cls.tmpdir.name) / "normalized.db")
+        mini_project2.build_normalized_database(data_filename, normalized_database_filename)
+        cls.conn = mini_project2.open_report_connection(normalized_database_filename)
+
+    def test_sql_text_is_constant_per_report(self):
+        first = mini_project2.ex1(self.conn, "Thomas Hardy", parameterized=True)
+        second = mini_project2.ex1(self.conn, "Maria Anders", parameterized=True)
+        assert first.sql == second.sql
+        assert first.params == (5,) and second.params == (4,)
+
+    def test_plain_string_path_is_kept(self):
+        sql_statement = mini_project2.ex2(self.conn, "Thomas Hardy")
+        assert "?" not in sql_statement
+        assert "o.CustomerID = 5" in sql_statement
+        assert self.conn.execute(sql_statement).fetchall() == [("Thomas Hardy", 270.0)]
+
+    def test_run_report_matches_plain_sql(self):
+        for name, args in [("ex1", ("Ana Trujillo",)), ("ex2", ("Ana Trujillo",)), ("ex3", ()),
+                           ("ex4", ()), ("ex6", ()), ("ex9", ()), ("ex10", ()), ("ex11", ())]:
+            expected = self.conn.execute(getattr(mini_project2, name)(self.conn, *args)).fetchall()
+            assert mini_project2.run_report(self.conn, name, *args) == expected, name
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+        cls.tmpdir.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main()
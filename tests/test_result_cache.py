@@ -0,0 +1,93 @@
+import unittest
+import sys
+import sqlite3
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+sys.path.insert(1, str(Path(__file__).parents[1]))
+sys.path.insert(1, str(Path(__file__).parent))
+
+
+from pg_standin import StandInServer
+from sql_assistant import PostgresPool, ResultCache, canonicalize_sql, open_query
+
+VERSION_SQL = "SELECT count(*), max(rowid) FROM orders"
+
+
+class TestMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name) / "orders.db"
+        db = sqlite3.connect(self.path)
+        db.execute("CREATE TABLE orders (region text, total real)")
+        db.executemany("INSERT INTO orders VALUES (?, ?)", [("North", 10.0), ("South", 5.0)])
+        db.commit()
+        db.close()
+        self.server = StandInServer(self.path)
+        self.pool = PostgresPool(self.server.connect, maxconn=2)
+
+    def tearDown(self):
+        self.pool.close()
+        self.tmpdir.cleanup()
+
+    def query_count(self, sql):
+        return sum(1 for statement in self.server.statements if statement == sql)
+
+    def test_second_run_is_served_from_cache(self):
+        cache = ResultCache(version_sql=VERSION_SQL, version_ttl=0)
+        sql = "SELECT region, SUM(total) AS total FROM orders GROUP BY region ORDER BY region"
+        result = open_query(self.pool, sql, cache=cache)
+        assert not result.from_cache
+        again = open_query(self.pool, sql.lower() + " ;", cache=cache)
+        assert again.from_cache
+        pd.testing.assert_frame_equal(again.frame, result.frame)
+        assert self.query_count(sql) == 1
+
+    def test_data_change_invalidates(self):
+        cache = ResultCache(version_sql=VERSION_SQL, version_ttl=0)
+        sql = "SELECT count(*) AS n FROM orders"
+        open_query(self.pool, sql, cache=cache)
+        db = sqlite3.connect(self.path)
+        db.execute("INSERT INTO orders VALUES ('East', 1.0)")
+        db.commit()
+        db.close()
+        result = open_query(self.pool, sql, cache=cache)
+        assert not result.from_cache
+        assert result.frame["n"].tolist() == [3]
+
+    def test_version_is_reread_only_after_ttl(self):
+        clock = [0.0]
+        cache = ResultCache(version_sql=VERSION_SQL, version_ttl=5, clock=lambda: clock[0])
+        for now in (0.0, 1.0, 4.0):
+            clock[0] = now
+            open_query(self.pool, "SELECT 1 AS one", cache=cache)
+        assert self.query_count(VERSION_SQL) == 1
+        clock[0] = 6.0
+        open_query(self.pool, "SELECT 1 AS one", cache=cache)
+        assert self.query_count(VERSION_SQL) == 2
+
+    def test_memory_budget_evicts_least_recently_used(self):
+        frame = pd.DataFrame({"x": range(100)})
+        size = int(frame.memory_usage(deep=True).sum())
+        cache = ResultCache(max_bytes=2 * size)
+        cache.put("select 1", 1, frame)
+        cache.put("select 2", 1, frame)
+        assert cache.get("select 1", 1) is frame
+        cache.put("select 3", 1, frame)
+        assert cache.get("select 2", 1) is None
+        assert cache.get("select 1", 1) is frame
+        assert cache.size_bytes == 2 * size
+        cache.put("select 4", 1, pd.DataFrame({"x": range(1000)}))
+        assert cache.get("select 4", 1) is None
+
+    def test_canonicalize_sql(self):
+        assert canonicalize_sql("SELECT  *\n FROM Orders WHERE region = 'North  X';") == (
+            "select * from orders where region = 'North  X'"
+        )
+        assert canonicalize_sql('SELECT "Region" FROM t') != canonicalize_sql('SELECT "region" FROM t')
+
+
+if __name__ == '__main__':
+    unittest.main()
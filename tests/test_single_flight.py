@@ -0,0 +1,173 @@
+import unittest
+import sys
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(1, str(Path(__file__).parents[1]))
+sys.path.insert(1, str(Path(__file__).parent))
+
+
+import sql_assistant
+from pg_standin import StandInServer
+from sql_assistant import PostgresPool, SingleFlight, SqlGuard, open_query
+
+
+def run_concurrently(n, fn):
+    """Start ``fn(i)`` on ``n`` threads; returns the threads and the list their results go into."""
+    results = [None] * n
+
+    def target(i):
+        results[i] = fn(i)
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def wait_for_callers(flights, n):
+    """Block until ``n`` callers are waiting on calls in ``flights``."""
+    deadline = time.monotonic() + 5
+    while flights.in_flight() < n:
+        assert time.monotonic() < deadline, f"only {flights.in_flight()} of {n} callers joined"
+        time.sleep(0.001)
+
+
+class BlockingGuard(SqlGuard):
+    """Holds every query in prepare() until ``release`` is set, noting the thread it ran on."""
+
+    def __init__(self):
+        super().__init__(limit=None)
+        self.release = threading.Event()
+        self.threads = []
+
+    def prepare(self, conn, sql):
+        self.threads.append(threading.current_thread().name)
+        self.release.wait(5)
+        return super().prepare(conn, sql)
+
+
+class FakeModel:
+    model_name = "fake"
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+
+    def generate_content(self, text):
+        self.calls += 1
+        self.release.wait(5)
+        return type("Response", (), {"text": "```sql\nSELECT region FROM orders;\n```"})()
+
+
+class TestMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.flights = SingleFlight(max_workers=4)
+
+    def tearDown(self):
+        self.flights.shutdown()
+
+    def test_concurrent_calls_share_one_execution(self):
+        calls = []
+        release = threading.Event()
+
+        def work():
+            calls.append(threading.current_thread().name)
+            release.wait(5)
+            return 42
+
+        threads, results = run_concurrently(5, lambda i: self.flights.do("k", work))
+        wait_for_callers(self.flights, 5)
+        assert self.flights.in_flight("k") == 5
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1 and calls[0].startswith("assistant")
+        assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+        assert all(value == 42 for value, _ in results)
+        # Nothing is remembered once the call is done.
+        assert self.flights.do("k", work) == (42, False)
+        assert len(calls) == 2
+
+    def test_exception_reaches_every_waiter(self):
+        release = threading.Event()
+
+        def fail():
+            release.wait(5)
+            raise ValueError("boom")
+
+        errors = []
+
+        def call(i):
+            try:
+                self.flights.do("k", fail)
+            except ValueError as e:
+                errors.append(e)
+
+        threads, _ = run_concurrently(3, call)
+        wait_for_callers(self.flights, 3)
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert len(errors) == 3
+
+    def test_nl_to_sql_coalesces_equivalent_prompts(self):
+        model = FakeModel()
+        prompts = ["Sales by region?", "sales  by region", "SALES BY REGION."]
+        threads, results = run_concurrently(
+            3, lambda i: sql_assistant.nl_to_sql(model, "system", prompts[i], flights=self.flights)
+        )
+        wait_for_callers(self.flights, 3)
+        model.release.set()
+        for thread in threads:
+            thread.join()
+        assert model.calls == 1
+        assert results == ["SELECT region FROM orders"] * 3
+
+    def open_concurrently(self, n, page_size):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "orders.db"
+            db = sqlite3.connect(path)
+            db.execute("CREATE TABLE orders (region text, total real)")
+            db.executemany("INSERT INTO orders VALUES (?, ?)", [("North", 10.0), ("South", 5.0)])
+            db.commit()
+            db.close()
+            server = StandInServer(path)
+            pool = PostgresPool(server.connect, maxconn=n)
+            guard = BlockingGuard()
+            sql = "SELECT region, SUM(total) AS total FROM orders GROUP BY region ORDER BY region"
+
+            threads, results = run_concurrently(
+                n, lambda i: open_query(pool, sql, guard=guard, page_size=page_size, flights=self.flights)
+            )
+            wait_for_callers(self.flights, n)
+            guard.release.set()
+            for thread in threads:
+                thread.join()
+            for result in results:
+                result.close()
+            pool.close()
+        return server.statements.count(sql), guard.threads, results
+
+    def test_open_query_coalesces_identical_sql(self):
+        executed, threads, results = self.open_concurrently(4, page_size=10)
+        assert executed == 1
+        assert sorted(result.shared for result in results) == [False, True, True, True]
+        for result in results:
+            assert result.complete
+            assert result.frame["region"].tolist() == ["North", "South"]
+
+    def test_followers_of_a_paging_result_open_their_own_on_the_executor(self):
+        executed, threads, results = self.open_concurrently(3, page_size=1)
+        assert executed == 3
+        assert all(name.startswith("assistant") for name in threads), threads
+        assert all(result.frame["region"].tolist() == ["North"] for result in results)
+        assert not any(result.shared for result in results)
+
+
+if __name__ == '__main__':
+    unittest.main()
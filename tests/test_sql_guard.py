@@ -0,0 +1,82 @@
+import unittest
+import sys
+import sqlite3
+import tempfile
+from pathlib import Path
+
+sys.path.insert(1, str(Path(__file__).parents[1]))
+sys.path.insert(1, str(Path(__file__).parent))
+
+
+from pg_standin import StandInServer
+from sql_assistant import PostgresPool, QueryRejected, SqlGuard, open_query
+
+
+class TestMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        path = Path(self.tmpdir.name) / "orders.db"
+        db = sqlite3.connect(path)
+        db.execute("CREATE TABLE orders (region text, total real)")
+        db.executemany("INSERT INTO orders VALUES (?, ?)", [("North", 10.0), ("South", 5.0)])
+        db.commit()
+        db.close()
+        self.server = StandInServer(path)
+        self.pool = PostgresPool(self.server.connect, maxconn=1)
+        self.guard = SqlGuard(max_cost=1000, limit=50, statement_timeout=2.5)
+
+    def tearDown(self):
+        self.pool.close()
+        self.tmpdir.cleanup()
+
+    def test_rejects_anything_but_one_select(self):
+        for sql in [
+            "DELETE FROM orders",
+            "SELECT 1; DROP TABLE orders",
+            "WITH gone AS (DELETE FROM orders RETURNING *) SELECT * FROM gone",
+            "SELECT * INTO backup FROM orders",
+            "SELECT * FROM orders FOR UPDATE",
+            "SELECT pg_sleep(600)",
+            "SELECT 'unterminated FROM orders",
+            "  ",
+        ]:
+            with self.subTest(sql=sql):
+                with self.assertRaises(QueryRejected):
+                    self.guard.check(sql)
+
+    def test_keywords_inside_literals_and_comments_are_fine(self):
+        sql = "SELECT 'delete; drop' AS note, \"update\" FROM orders -- insert\nWHERE region = 'North'"
+        assert self.guard.check(sql) == sql + "\nLIMIT 50"
+
+    def test_limit_injection(self):
+        assert self.guard.check("SELECT * FROM orders;") == "SELECT * FROM orders\nLIMIT 50"
+        assert self.guard.check("SELECT * FROM orders LIMIT 5") == "SELECT * FROM orders LIMIT 5"
+        # A LIMIT inside a subquery does not bound the outer query.
+        assert self.guard.check("SELECT * FROM (SELECT * FROM orders LIMIT 5) t").endswith("\nLIMIT 50")
+        assert self.guard.check("SELECT * FROM orders FETCH FIRST 3 ROWS ONLY").endswith("ONLY")
+        assert SqlGuard(limit=None).check("SELECT 1") == "SELECT 1"
+
+    def test_prepare_bounds_the_transaction(self):
+        result = open_query(self.pool, "SELECT region FROM orders ORDER BY region", guard=self.guard)
+        assert result.frame["region"].tolist() == ["North", "South"]
+        assert result.sql.endswith("\nLIMIT 50")
+        assert "SET TRANSACTION READ ONLY" in self.server.statements
+        assert "SET LOCAL statement_timeout = 2500" in self.server.statements
+        assert any(s.startswith("EXPLAIN (FORMAT JSON) SELECT region") for s in self.server.statements)
+
+    def test_expensive_plan_is_rejected_before_it_runs(self):
+        self.server.plan_cost = 5e6
+        sql = "SELECT a.region FROM orders a, orders b, orders c"
+        with self.assertRaises(QueryRejected) as caught:
+            open_query(self.pool, sql, guard=self.guard)
+        assert "5,000,000" in str(caught.exception)
+        assert not any(s.startswith(sql) for s in self.server.statements)
+        # The rejected query gave its connection back.
+        self.server.plan_cost = 10.0
+        result = open_query(self.pool, "SELECT count(*) AS n FROM orders", guard=self.guard)
+        assert result.frame["n"].tolist() == [2]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+
+import sqlite3
+sys.path.insert(1, str(Path(__file__).parents[1]))
+
+
+import benchmark
+import mini_project2
+import synthetic_data
+
+
+class TestMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.tmp = Path(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def generate(self, name, **options):
+        path = str(self.tmp / name)
+        line_items = synthetic_data.generate_data(path, **options)
+        return path, line_items
+
+    def test_same_seed_same_bytes(self):
+        first, _ = self.generate("a.csv", customers=1500, seed=3)
+        second, _ = self.generate("b.csv", customers=1500, seed=3)
+        third, _ = self.generate("c.csv", customers=1500, seed=4)
+        assert Path(first).read_bytes() == Path(second).read_bytes()
+        assert Path(first).read_bytes() != Path(third).read_bytes()
+
+    def test_knobs_shape_the_database(self):
+        path, line_items = self.generate(
+            "data.csv", customers=200, items_per_customer=4, products=12, categories=3,
+            start_date="2020-02-01", end_date="2020-03-31",
+        )
+        db = str(self.tmp / "normalized.db")
+        mini_project2.build_normalized_database(path, db)
+        conn = sqlite3.connect(db)
+        try:
+            assert conn.execute("SELECT count(*) FROM Customer").fetchone() == (200,)
+            assert conn.execute("SELECT count(*) FROM OrderDetail").fetchone() == (line_items,)
+            assert conn.execute("SELECT count(*) FROM Product").fetchone()[0] <= 12
+            assert conn.execute("SELECT count(*) FROM ProductCategory").fetchone()[0] <= 3
+            first, last = conn.execute("SELECT MIN(OrderDate), MAX(OrderDate) FROM OrderDetail").fetchone()
+            assert "2020-02-01" <= first <= last <= "2020-03-31"
+            assert conn.execute("SELECT MAX(c) FROM (SELECT count(*) c FROM OrderDetail GROUP BY CustomerID)").fetchone()[0] <= 7
+        finally:
+            conn.close()
+        mini_project2._forget_database(db)
+
+    def test_rejects_bad_knobs(self):
+        with self.assertRaises(ValueError):
+            self.generate("data.csv", products=2, categories=3)
+        with self.assertRaises(ValueError):
+            self.generate("data.csv", start_date="2021-01-02", end_date="2021-01-01")
+
+    def test_suite_times_every_step_and_query(self):
+        results = benchmark.run_suite([20], repeat=1, items_per_customer=3)
+        (run,) = results["runs"]
+        assert run["customers"] == 20
+        assert list(run["timings"]) == [f"step{i}" for i in range(1, 12)] + benchmark.QUERIES
+        rows = benchmark.compare_results(results, results)
+        assert len(rows) == len(run["timings"])
+
+
+if __name__ == '__main__':
+    unittest.main()